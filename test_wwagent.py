@@ -0,0 +1,172 @@
+
+'''Tests of the Wumpus World agent's inference engines'''
+#
+# the bitmask and propagate engines must count the same models as the truth table engine (countTruthtable),
+# and the frontier engine must give the same safe probabilities as enumerating every world that fits the percepts
+#
+# run with:
+# python3 -m pytest -q test_wwagent.py
+
+
+import random
+
+import pytest
+
+import wwlog
+import wwagent
+from wwagent import roomSymbol
+
+wwlog.setLevel(wwlog.QUIET)
+
+# (cols, rows) of the grid and the agent's room, one of each kind of room
+POSITIONS = [((4, 4), (0, 3)), ((4, 4), (0, 0)), ((4, 4), (3, 1)), ((4, 4), (2, 0)), ((4, 4), (1, 2)), ((3, 5), (1, 3))]
+
+# a world of the grid 'size' as (pit rooms, wumpus room), no pit or wumpus in the start room
+def randomWorld(rng, size, start):
+    rooms = [(x, y) for x in range(size[0]) for y in range(size[1]) if (x, y) != start]
+    pits = set([room for room in rooms if rng.random() < wwagent.PIT_PROBABILITY])
+    return (pits, rng.choice(rooms))
+
+# agent that has walked safely through 'visits' rooms of the world, picked at random, next to rooms already visited
+def exploredAgent(rng, engine, size, world, visits):
+    pits, wumpus = world
+    agent = wwagent.WWAgent(engine, cache=None, cols=size[0], rows=size[1])
+    frontier = [agent.position]
+    while frontier and len(agent.visited) < visits:
+        room = frontier.pop(rng.randrange(len(frontier)))
+        if room in agent.visited:
+            continue
+        near = agent.grid.surrounding[room]
+        percepts = []
+        if wumpus in near:
+            percepts.append('stench')
+        if pits & set(near):
+            percepts.append('breeze')
+        agent.position = room
+        agent.percepts = tuple(percepts)
+        agent.updateKB()
+        frontier += [room for room in near if room not in pits and room != wumpus and room not in agent.visited]
+    return agent
+
+# symbols of the agent's room and the rooms next to it, as WWAgent.action builds them
+def windowSymbols(agent):
+    rooms = list(agent.grid.surrounding[agent.position]) + [agent.position]
+    return (rooms, [roomSymbol(kind, room) for room in rooms for kind in 'pbsw'])
+
+def safeAlphas(rooms):
+    return [[(roomSymbol('w', room), False), (roomSymbol('p', room), False)] for room in rooms]
+
+def truthtableCounts(agent, symbols, alphas):
+    safeCounts = [0 for alpha in alphas]
+    n = agent.countTruthtable(list(symbols), [], agent.kb, alphas, safeCounts)
+    return (n, safeCounts)
+
+# KB of random literals about the window, most of them contradicting each other or the rules
+def randomKB(rng, symbols):
+    kb = wwagent.KnowledgeBase()
+    for symbol in rng.sample(symbols, rng.randint(0, len(symbols) // 2)):
+        kb.add(symbol if rng.random() < 0.5 else 'n' + symbol)
+    return kb
+
+@pytest.mark.parametrize('engine', ['bitmask', 'propagate'])
+@pytest.mark.parametrize('size, position', POSITIONS)
+def test_counts_match_truthtable(engine, size, position):
+    rng = random.Random(repr((engine, size, position)))
+    for i in range(6):
+        world = randomWorld(rng, size, (0, size[1] - 1))
+        agent = exploredAgent(rng, 'truthtable', size, world, rng.randint(1, size[0] * size[1]))
+        agent.position = position
+        if rng.random() < 0.5:
+            agent.kb = randomKB(rng, windowSymbols(agent)[1])
+        rooms, symbols = windowSymbols(agent)
+        # the full window of an interior room takes seconds to enumerate, so only some of its symbols are kept
+        if len(symbols) > 16:
+            symbols = rng.sample(symbols, 16)
+        alphas = safeAlphas(rooms)
+        expected = truthtableCounts(agent, symbols, alphas)
+        count = wwagent.countBitmask if engine == 'bitmask' else wwagent.countPropagate
+        assert count(symbols, agent.kb, agent.position, alphas, agent.size) == expected
+
+# the whole window of an interior room once, as the agent enumerates it
+def test_counts_match_truthtable_interior():
+    rng = random.Random(5)
+    world = (set([(3, 3)]), (2, 0))
+    agent = exploredAgent(rng, 'truthtable', (4, 4), world, 6)
+    agent.position = (1, 1)
+    rooms, symbols = windowSymbols(agent)
+    alphas = safeAlphas(rooms)
+    expected = truthtableCounts(agent, symbols, alphas)
+    assert wwagent.countBitmask(symbols, agent.kb, agent.position, alphas, agent.size) == expected
+    assert wwagent.countPropagate(symbols, agent.kb, agent.position, alphas, agent.size) == expected
+
+# safe probability of every unknown room, from every placement of the pits and the wumpus that fits the percepts
+# of the visited rooms, pits are independent with PIT_PROBABILITY and the wumpus is in any room but the start
+def bruteForceProbabilities(agent, world):
+    pits, wumpus = world
+    unknown = sorted(agent.unknown)
+    bits = dict([(room, 1 << i) for i, room in enumerate(unknown)])
+    breezes = []
+    for room in agent.visited:
+        mask = 0
+        for near in agent.grid.surrounding[room]:
+            mask |= bits.get(near, 0)
+        breezes.append((mask, bool(pits & set(agent.grid.surrounding[room]))))
+    prior = wwagent.PIT_PROBABILITY
+    total = 0.0
+    pitWeights = [0.0 for room in unknown]
+    for placement in range(1 << len(unknown)):
+        if any([bool(placement & mask) != breeze for mask, breeze in breezes]):
+            continue
+        count = bin(placement).count('1')
+        weight = prior ** count * (1 - prior) ** (len(unknown) - count)
+        total += weight
+        for i in range(len(unknown)):
+            if placement & (1 << i):
+                pitWeights[i] += weight
+    wumpusRooms = [room for room in unknown
+                   if all([(room in agent.grid.surrounding[visited]) == (wumpus in agent.grid.surrounding[visited])
+                           for visited in agent.visited])]
+    probs = {}
+    for i, room in enumerate(unknown):
+        noWumpus = 1 - (1 / len(wumpusRooms) if room in wumpusRooms else 0)
+        probs[room] = (1 - pitWeights[i] / total) * noWumpus
+    return probs
+
+@pytest.mark.parametrize('size', [(4, 4), (3, 5), (5, 3)])
+def test_frontier_matches_brute_force(size):
+    rng = random.Random(repr(size))
+    for i in range(25):
+        world = randomWorld(rng, size, (0, size[1] - 1))
+        agent = exploredAgent(rng, 'frontier', size, world, rng.randint(1, size[0] * size[1]))
+        probs = agent.frontierProbabilities()
+        expected = bruteForceProbabilities(agent, world)
+        assert sorted(probs) == sorted(expected)
+        for room in expected:
+            assert probs[room] == pytest.approx(expected[room], abs=1e-9)
+
+# agents of two grid sizes in the same state share a cache, each must get the probabilities of its own grid
+def test_cache_keeps_grid_sizes_apart():
+    cache = wwagent.PtableCache()
+    for cols in (4, 5):
+        agent = wwagent.WWAgent('frontier', cache=cache, cols=cols, rows=4)
+        agent.percepts = ('breeze',)
+        agent.updateKB()
+        rooms, symbols = windowSymbols(agent)
+        assert agent.safeProbabilities(rooms[:-1], symbols) == agent.computeProbabilities(rooms[:-1], symbols)
+    assert len(cache.table) == 2
+
+# the truthtable engine times its rule checks through the profile it is handed, and every call of safeProbabilities
+# is counted either as an inference or as a cache hit
+def test_profile_counts_inferences_and_cache_hits():
+    rules = wwagent.isTrueRules
+    agent = wwagent.WWAgent('truthtable', cache=wwagent.PtableCache(), cols=3, rows=3, profile=True)
+    agent.percepts = ('breeze',)
+    agent.updateKB()
+    rooms, symbols = windowSymbols(agent)
+    agent.profile.current = dict([(name, 0) for name in wwagent.PROFILE_SECTIONS + wwagent.PROFILE_COUNTERS])
+    first = agent.safeProbabilities(rooms[:-1], symbols)
+    assert agent.safeProbabilities(rooms[:-1], symbols) == first
+    decision = agent.profile.current
+    assert decision['inferences'] == 1 and decision['cacheHits'] == 1
+    assert decision['models'] == agent.n and decision['isTrueRules'] > 0
+    assert wwagent.isTrueRules is rules
@@ -0,0 +1,36 @@
+
+'''Tests of the Wumpus World batch runner'''
+#
+# a batch is fixed by its seed and episode IDs, so it must give the same results whichever number of workers runs it
+# and however many batches the process has run before
+#
+# run with:
+# python3 -m pytest -q test_wwbatch.py
+
+
+from functools import partial
+
+import pytest
+
+import wwbatch
+
+# results of the episodes without their wall times, which are the only part that may differ between runs
+def outcomes(results):
+    return [(episodeId, result.score, result.outcome, result.steps) for episodeId, result in results]
+
+# summary without the timings
+def summaryWithoutTimes(results):
+    summary = wwbatch.summarize(results, 1.0)
+    for key in ('episodeTime', 'wallTime', 'episodesPerSecond'):
+        del summary[key]
+    return summary
+
+@pytest.mark.parametrize('agent', sorted(wwbatch.AGENTS))
+def test_workers_give_the_same_results(agent):
+    agentFactory = partial(wwbatch.AGENTS[agent], 'bitmask')
+    single = wwbatch.runBatch(agentFactory, 60, workers=1, seed=9)
+    again = wwbatch.runBatch(agentFactory, 60, workers=1, seed=9)
+    pooled = wwbatch.runBatch(agentFactory, 60, workers=3, seed=9)
+    assert outcomes(again) == outcomes(single)
+    assert outcomes(pooled) == outcomes(single)
+    assert summaryWithoutTimes(pooled) == summaryWithoutTimes(single)
@@ -18,46 +18,278 @@ Modified by Amanda Martin from wwagent.py:
     # 'move' 'grab' 'shoot' 'left' right'
 """
 
-from random import randint
-import copy
+import time
+import random
+from collections import OrderedDict
+
+import wwlog
+import wwgrid
+
+PIT_PROBABILITY = 1/5 # chance of a pit in each room, as in Simulation.generate_simulation
+FRONTIER_EXACT_ROOMS = 20 # larger groups of pit rooms are estimated room by room by the frontier engine
+ENGINES = ('truthtable', 'bitmask', 'propagate', 'frontier') # inference engines of WWAgent, see modelcheckAll
+
+# least recently used cache of safe probabilities, keyed on the state the engines compute them from
+class PtableCache:
+
+    def __init__(self, maxsize=50000):
+        self.maxsize = maxsize
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        probs = self.table.get(key)
+        if probs is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.table.move_to_end(key)
+        return probs
+
+    def put(self, key, probs):
+        self.table[key] = probs
+        self.table.move_to_end(key)
+        while len(self.table) > self.maxsize:
+            self.table.popitem(last=False)
+
+    def clear(self):
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+
+# shared by every agent in the process, so KB patterns seen in earlier episodes are not recomputed
+ptableCache = PtableCache()
+
+# number of models (leaves of the enumeration) the engines have looked at, read by wwbench.py
+# models pruned by countPropagate or countPits before they are complete are not counted
+class EngineStats:
+
+    def __init__(self):
+        self.leaves = 0
+
+    def clear(self):
+        self.leaves = 0
+
+engineStats = EngineStats()
+
+# Timings and counters of each decision of an agent, turned on with WWAgent(profile=True)
+# the timed methods are wrapped on the agent itself, and the inference is handed the profile to count models and time
+# the rule checks of the truthtable engine, an agent without a profile skips both
+# sections, in seconds:
+#   updateKB     - WWAgent.updateKB
+#   modelcheck   - WWAgent.safeProbabilities, the inference of the engine including the cache lookups
+#   isTrueRules  - the isTrueRules calls of the truthtable engine, part of modelcheck
+#   isTrueKB     - the isTrueKB calls of the truthtable engine, part of modelcheck
+#   planning     - the rest of WWAgent.action, choosing the next room and the path to it
+# counters:
+#   leaves       - models looked at by the engine, as counted in engineStats
+#   models       - leaves that follow the KB and the rules (self.n)
+#   safe         - safe leaves (self.m), summed over the rooms checked
+#   inferences   - safeProbabilities calls the engine ran for
+#   cacheHits    - safeProbabilities calls answered by the agent's own probabilities or the ptable cache, which add no models
+PROFILE_SECTIONS = ('updateKB', 'modelcheck', 'isTrueRules', 'isTrueKB', 'planning')
+PROFILE_COUNTERS = ('leaves', 'models', 'safe', 'inferences', 'cacheHits')
+
+# engines each section and counter is measured for, the others are always 0
+# the bitmask and propagate engines check the rules inside their own loops, and the frontier engine counts pits, not models
+PROFILE_ENGINES = {
+    'isTrueRules': ('truthtable',),
+    'isTrueKB': ('truthtable',),
+    'models': ('truthtable', 'bitmask', 'propagate'),
+    'safe': ('truthtable', 'bitmask', 'propagate'),
+}
+
+class AgentProfile:
+
+    def __init__(self):
+        self.decisions = [] # one dict per action call, the sections and counters plus its 'time' and 'action'
+        self.current = None # dict of the decision being made
+
+    # wraps the methods of 'agent' that are timed
+    def attach(self, agent):
+        action = agent.action
+        updateKB = agent.updateKB
+        safeProbabilities = agent.safeProbabilities
+        def profiledAction():
+            self.current = dict([(section, 0.0) for section in PROFILE_SECTIONS] + [(counter, 0) for counter in PROFILE_COUNTERS])
+            leaves = engineStats.leaves
+            start = time.perf_counter()
+            result = action()
+            elapsed = time.perf_counter() - start
+            decision = self.current
+            self.current = None
+            decision['planning'] = elapsed - decision['updateKB'] - decision['modelcheck']
+            decision['leaves'] = engineStats.leaves - leaves
+            decision['time'] = elapsed
+            decision['action'] = result
+            self.decisions.append(decision)
+            if wwlog.sinks:
+                wwlog.event('decision', position=list(agent.position), **decision)
+            return result
+        def profiledUpdateKB():
+            self.timed('updateKB', updateKB)
+        def profiledSafeProbabilities(rooms, symbols):
+            return self.timed('modelcheck', safeProbabilities, rooms, symbols)
+        agent.action = profiledAction
+        agent.updateKB = profiledUpdateKB
+        agent.safeProbabilities = profiledSafeProbabilities
+
+    # calls function(*args) and adds the time it took to 'section' of the current decision
+    def timed(self, section, function, *args):
+        if self.current is None:
+            return function(*args)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.current[section] += time.perf_counter() - start
+
+    # adds n to 'counter' of the current decision, called by the agent's inference, which is handed the profile
+    def count(self, counter, n=1):
+        if self.current is not None:
+            self.current[counter] += n
+
+    # sums of the sections and counters over every decision so far, the agent's episode
+    def totals(self):
+        totals = dict([(section, 0.0) for section in PROFILE_SECTIONS] + [(counter, 0) for counter in PROFILE_COUNTERS])
+        totals['time'] = 0.0
+        for decision in self.decisions:
+            for key in totals:
+                totals[key] += decision[key]
+        totals['decisions'] = len(self.decisions)
+        return totals
+
+# adds the totals of one profile to 'totals', e.g. to sum the episodes of a batch
+def addProfileTotals(totals, more):
+    for key, value in more.items():
+        totals[key] = totals.get(key, 0) + value
+    return totals
+
+# symbols are interned to small integer ids shared by every KB in the process
+symbolIds = {}
+symbolNames = []
+
+def internSymbol(symbol):
+    symbolId = symbolIds.get(symbol)
+    if symbolId is None:
+        symbolId = len(symbolNames)
+        symbolIds[symbol] = symbolId
+        symbolNames.append(symbol)
+    return symbolId
+
+# conjunction of known propositions, either true (prop) or false ('n'+prop)
+# the ids of the true and the false symbols are kept in separate sets for constant time lookups
+class KnowledgeBase:
+
+    def __init__(self):
+        self.true = set()
+        self.false = set()
+        self.snapshot = None # frozen() of the KB, until the next add
+
+    # adds prop unless it, or 'n'+prop, is already known, returns true if the KB changed
+    def add(self, prop):
+        if prop in self or ('n'+prop) in self:
+            return False
+        if prop.startswith('n'):
+            self.false.add(internSymbol(prop[1:]))
+        else:
+            self.true.add(internSymbol(prop))
+        self.snapshot = None
+        return True
+
+    def isKnownTrue(self, symbol):
+        symbolId = symbolIds.get(symbol)
+        return symbolId is not None and symbolId in self.true
+
+    def isKnownFalse(self, symbol):
+        symbolId = symbolIds.get(symbol)
+        return symbolId is not None and symbolId in self.false
+
+    # hashable snapshot of the KB
+    def frozen(self):
+        if self.snapshot is None:
+            self.snapshot = (frozenset(self.true), frozenset(self.false))
+        return self.snapshot
+
+    def __contains__(self, prop):
+        if prop.startswith('n'):
+            return self.isKnownFalse(prop[1:])
+        return self.isKnownTrue(prop)
+
+    def __iter__(self):
+        for symbolId in self.true:
+            yield symbolNames[symbolId]
+        for symbolId in self.false:
+            yield 'n' + symbolNames[symbolId]
+
+    def __len__(self):
+        return len(self.true) + len(self.false)
+
+    def __repr__(self):
+        return repr(list(self))
 
 # This is the class that represents an agent
 class WWAgent:
 
-    def __init__(self):
-        self.max=4 # number of cells in one side of square world
+    def __init__(self, engine='bitmask', cache=ptableCache, cols=4, rows=4, profile=False):
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine \'' + str(engine) + '\', use one of ' + ', '.join(ENGINES))
+        self.cols = cols # number of rooms across the world
+        self.rows = rows # number of rooms down the world
+        self.size = (cols, rows)
+        self.grid = wwgrid.getGrid(rows, cols) # neighbours of every room, shared with the other agents and the simulation
         self.stopTheAgent=False # set to true to stop th agent at end of episode
-        self.position = (0, 3) # top is (0,0)
+        self.position = (0, rows-1) # top is (0,0)
         self.directions=['up','right','down','left']
         self.facing = 'right'
         self.arrow = 1
         self.percepts = (None, None, None, None, None)
-        self.map = [[ self.percepts for i in range(self.max) ] for j in range(self.max)]
-        print("New agent created")
+        self.map = [[ self.percepts for i in range(rows) ] for j in range(cols)]
+        wwlog.info("New agent created")
         # full symbols list
-        self.symbols =  ['p03', 'p02', 'p01', 'p00', 'p10', 'p11', 'p12', 'p13', 'p23', 'p22', 'p21', 'p20', 'p30', 'p31', 'p32', 'p33',
-                         'b03', 'b02', 'b01', 'b00', 'b10', 'b11', 'b12', 'b13', 'b23', 'b22', 'b21', 'b20', 'b30', 'b31', 'b32', 'b33',
-                         's03', 's02', 's01', 's00', 's10', 's11', 's12', 's13', 's23', 's22', 's21', 's20', 's30', 's31', 's32', 's33',
-                         'w03', 'w02', 'w01', 'w00', 'w10', 'w11', 'w12', 'w13', 'w23', 'w22', 'w21', 'w20', 'w30', 'w31', 'w32', 'w33']
+        self.symbols = getSymbols(self.size)
+        self.roomSymbols = getRoomSymbols(self.size) # symbols of each room, pit, breeze, stench and wumpus
         self.model = []
-        self.kb = [] # conjunction of known propositions, either true (prop) or false ('n'+prop)
+        self.kb = KnowledgeBase() # conjunction of known propositions, either true (prop) or false ('n'+prop)
         self.alpha = [] # that target room is 100% safe (no wumpus or pit)
         #self.infer = [] # disjunction of propositions based on percepts
         self.visited = [] # list of rooms that have already been visited
         self.unvisited = [] # list of rooms that have been determined to be safe but weren't yet explored
         self.hasMove = None # is move has been calculated but agent isn't yet facing the right direction
-        self.path = [(0,3)]
+        self.path = [self.position]
 
         '''class attributes for probabilistic model checking'''
         self.n = 0 # count number of models that follow the KB
         self.m = 0 # count number of models that are safe
-        self.ptable = [[ None for i in range(self.max) ] for j in range(self.max)] # holds probabilities for each room
+        self.ptable = [[ None for i in range(rows) ] for j in range(cols)] # holds probabilities for each room
+        # 'truthtable' for the list based modelcheck, 'bitmask' for countBitmask, 'propagate' for countPropagate
+        # 'frontier' for frontierProbabilities
+        self.engine = engine
+        self.cache = cache # PtableCache for the probabilities of each state, None to always recompute
+        self.rng = random.Random() # source of the agent's random choices, seeded by the simulation
+        self.dirty = True # set by updateKB when it adds to the KB, the probabilities in self.probs are then stale
+        self.probs = {} # safe probabilities computed since the KB last changed, keyed on (position, rooms)
+
+        '''class attributes for the frontier engine, updated as rooms are visited'''
+        self.unknown = set([(x, y) for x in range(cols) for y in range(rows)]) # rooms neither visited nor the start
+        self.unknown.discard(self.position)
+        self.noPit = set() # rooms next to a visited room without a breeze
+        self.breezes = [] # rooms around each visited room with a breeze, at least one of them has a pit
+        self.wumpusRooms = set(self.unknown) # rooms next to every stench and next to no visited room without one
+        self.pitGroups = {} # pit probabilities of each group of breeze constraints already counted
  
 
         '''class attributes for backtracking to previously model checked rooms'''
         self.isBackTracking = False
         self.path2= []
         self.goalMove = None 
+
+        # AgentProfile of each decision if profile is true, otherwise None
+        self.profile = None
+        if profile:
+            self.profile = AgentProfile()
+            self.profile.attach(self)
     
     # Add the latest percepts to list of percepts received so far
     # This function is called by the wumpus simulation and will
@@ -67,7 +299,7 @@ class WWAgent:
     def update(self, percept):
         self.percepts=percept
         #[stench, breeze, glitter, bump, scream]
-        if self.position[0] in range(self.max) and self.position[1] in range(self.max):
+        if self.position[0] in range(self.cols) and self.position[1] in range(self.rows):
             self.map[ self.position[0]][self.position[1]]=self.percepts
         # puts the percept at the spot in the map where sensed
 
@@ -79,9 +311,9 @@ class WWAgent:
         if self.facing=='up':
             self.position = (self.position[0],max(0,self.position[1]-1))
         elif self.facing =='down':
-            self.position = (self.position[0],min(self.max-1,self.position[1]+1))
+            self.position = (self.position[0],min(self.rows-1,self.position[1]+1))
         elif self.facing =='right':
-            self.position = (min(self.max-1,self.position[0]+1),self.position[1])
+            self.position = (min(self.cols-1,self.position[0]+1),self.position[1])
         elif self.facing =='left':
             self.position = (max(0,self.position[0]-1),self.position[1])
         return self.position
@@ -149,37 +381,46 @@ class WWAgent:
     # no wumpus in adjacent rooms if no stench in current room
     # no wumpus in non adjacent rooms if stench in current room (because only one wumpus per model)
     # and no pit in adjacent room if no breeze in current room
+    # marks the agent dirty if anything was added
     def updateKB(self):
+        kbSize = len(self.kb)
         if self.position not in self.visited:
-            temp = 'nw' + str(self.position[0]) + str(self.position[1])
+            temp = 'n' + roomSymbol('w', self.position)
             addToKB(temp, self.kb)
-            temp = 'np' + str(self.position[0]) + str(self.position[1])
+            temp = 'n' + roomSymbol('p', self.position)
             addToKB(temp, self.kb)
             if 'stench' in self.percepts:
-                addToKB('s' + str(self.position[0]) + str(self.position[1]), self.kb)
-                rooms = getSurroundingRooms(self.position) # get rooms surrounding the stench
-                for s in self.symbols:
-                    if (int(s[1]), int(s[2])) not in rooms:
-                        if s.startswith('w'):
-                            addToKB('n'+ s, self.kb) #only one wumpus, so no wumpus in all rooms not
+                addToKB(roomSymbol('s', self.position), self.kb)
+                rooms = self.grid.surrounding[self.position] # get rooms surrounding the stench
+                self.wumpusRooms &= set(rooms)
+                for x in range(self.cols):
+                    for y in range(self.rows):
+                        if (x, y) not in rooms:
+                            addToKB('n' + roomSymbol('w', (x, y)), self.kb) #only one wumpus, so no wumpus in all rooms not
             else:
-                addToKB('ns' + str(self.position[0]) + str(self.position[1]), self.kb)
-                rooms = getSurroundingRooms(self.position) # get rooms surrounding current room
+                addToKB('n' + roomSymbol('s', self.position), self.kb)
+                rooms = self.grid.surrounding[self.position] # get rooms surrounding current room
+                self.wumpusRooms -= set(rooms)
                 for room2 in rooms:
-                    temp = 'nw' + str(room2[0]) + str(room2[1])
+                    temp = 'n' + roomSymbol('w', room2)
                     addToKB(temp, self.kb)
             if 'breeze' in self.percepts:
-                addToKB('b' + str(self.position[0]) + str(self.position[1]), self.kb)
-                rooms = getSurroundingRooms(self.position) # get rooms surrounding the breeze
+                addToKB(roomSymbol('b', self.position), self.kb)
+                rooms = self.grid.surrounding[self.position] # get rooms surrounding the breeze
+                self.breezes.append(rooms)
             else:
-                addToKB('nb' + str(self.position[0]) + str(self.position[1]), self.kb)
-                rooms = getSurroundingRooms(self.position) # get rooms surrounding current room
+                addToKB('n' + roomSymbol('b', self.position), self.kb)
+                rooms = self.grid.surrounding[self.position] # get rooms surrounding current room
+                self.noPit.update(rooms)
                 for room2 in rooms:
-                    temp = 'np' + str(room2[0]) + str(room2[1]) 
+                    temp = 'n' + roomSymbol('p', room2)
                     addToKB(temp, self.kb)
             self.visited.append(self.position)
+            self.unknown.discard(self.position)
         if self.position in self.unvisited:
             self.unvisited.remove(self.position)
+        if len(self.kb) != kbSize:
+            self.dirty = True
 
     # function for steps taken once a valid 'move' has been found
     def move(self, room):
@@ -188,14 +429,14 @@ class WWAgent:
             self.hasMove = None
             action = 'move'
             self.calculateNextPosition(action)
-            print("moving towards ", room)
+            wwlog.debug("moving towards ", room)
             self.path.insert(0, room)
         else:
             self.hasMove = room
             action = self.calculateTurn(self.facing, direction)
             #action = 'left'
             self.calculateNextDirection(action)
-            print("turning ", action, " towards ", room)
+            wwlog.debug("turning ", action, " towards ", room)
         #print(self.kb)
         return action
 
@@ -204,12 +445,12 @@ class WWAgent:
     def action(self):
         # test for controlled exit at end of successful gui episode
         if self.stopTheAgent:
-            print("Agent has won this episode.")
+            wwlog.info("Agent has won this episode.")
             return 'exit' # will cause the episide to end
             
         #reflect action -- get the gold!
         if 'glitter' in self.percepts:
-            print("Agent will grab the gold!")
+            wwlog.info("Agent will grab the gold!")
             self.stopTheAgent=True
             return 'grab'
         
@@ -223,7 +464,7 @@ class WWAgent:
             if not self.path2:
                 self.isBackTracking = False
             else:   
-                theseRooms =  getSurroundingRooms(self.position)
+                theseRooms =  self.grid.surrounding[self.position]
                 if self.goalMove in theseRooms:
                     action = self.move(self.goalMove)
                     self.path2 = [] # clear backtracking path
@@ -233,7 +474,7 @@ class WWAgent:
                     self.path2.pop(0)
                     return action
                 else: # case should never be met, in case of accidental infinite loop
-                    print("error")
+                    wwlog.info("error")
                     return 'exit'
 
         # update the KB with the knowledge you learn from current position
@@ -241,63 +482,32 @@ class WWAgent:
         self.ptable[self.position[0]][self.position[1]] = 1.0 # if still alive, current square is 100% safe
 
         # add surrounding rooms to 'possiblemoves'
-        possiblemoves = getSurroundingRooms(self.position)
+        possiblemoves = self.grid.surrounding[self.position]
         # model only cares for surrounding rooms plus the current room
-        modelRooms = copy.deepcopy(possiblemoves)
+        modelRooms = list(possiblemoves)
         modelRooms.append(self.position)
         symbolsCleaned = []
-        for rooms in modelRooms:
-            room = str(rooms[0]) +str(rooms[1])
-            for s in self.symbols:
-                if s.endswith(room):
-                    symbolsCleaned.append(s)
+        for room in modelRooms:
+            symbolsCleaned.extend(self.roomSymbols[room])
         action = None
-        validMoves = []
-        # model check for each move
-        for move in possiblemoves:
-            # all visited rooms were previously model checked and are safe
-            if move in self.visited:
-                validMoves.append(move)
-            else:
-                if move in self.unvisited:
-                    validMoves.insert(0, move)
-                # alpha is that wumpus is not in that room and pit is not in that room
-                self.alpha = [('w' + str(move[0]) + str(move[1]), False), ('p' + str(move[0]) + str(move[1]), False)]
-                # reset m and n for room
-                self.m = 0
-                self.n= 0
-                # call model check
-                value = self.modelcheck(symbolsCleaned, self.model, self.kb, self.alpha)
-                #calculate probability and update table
-                if self.n != 0:
-                    prob = (self.m/self.n)
-                    if self.ptable[move[0]][move[1]] != 0.0:
-                        self.ptable[move[0]][move[1]] = prob
-                    print(self.ptable)
-                    if prob == 1.0:
-                        if move not in self.unvisited:
-                            self.unvisited.insert(0, move)
-                    else:
-                        self.unvisited.append(move)
-                else:
-                    print("room ", move, " safe in no models")
+        validMoves = self.checkMoves(possiblemoves, symbolsCleaned)
         if self.unvisited:
             for move in self.unvisited:
                 # move to 100% safe unvisited rooms first 
                 if self.ptable[move[0]][move[1]] == 1.0:
-                    print("room ", move, "unvisited and safe")
+                    wwlog.debug("room ", move, "unvisited and safe")
                     if move in possiblemoves:
                         action = self.move(move)
                         return action
                     else:
-                        print("backtracking to ", move)
+                        wwlog.debug("backtracking to ", move)
                         self.isBackTracking = True
                         self.goalMove = move
-                        goTo = getSurroundingRooms(move)
-                        print("path: ", self.path)
+                        goTo = self.grid.surrounding[move]
+                        wwlog.debug("path: ", self.path)
                         for room in goTo:
                             if room in self.path:
-                                print(self.path)
+                                wwlog.debug(self.path)
                                 self.path2 = self.path[1:(self.path.index(room)+1)]
                                 if self.path2[0] in validMoves:
                                     action = self.move(self.path2[0])
@@ -311,19 +521,19 @@ class WWAgent:
                     max = self.ptable[move[0]][move[1]]
                     newMove = move
             if newMove:
-                print("new move: ", newMove, " with prob: ", self.ptable[newMove[0]][newMove[1]])
+                wwlog.debug("new move: ", newMove, " with prob: ", self.ptable[newMove[0]][newMove[1]])
                 if newMove in possiblemoves:
                     action = self.move(newMove)
                     return action
                 else:
                     self.isBackTracking = True
                     self.goalMove = newMove
-                    goTo = getSurroundingRooms(newMove)
-                    print("move: ", self.goalMove)
+                    goTo = self.grid.surrounding[newMove]
+                    wwlog.debug("move: ", self.goalMove)
                     for room in goTo:
                         if room in self.path:
                             self.path2 = self.path[1:(self.path.index(room)+1)]
-                            print(self.path2)
+                            wwlog.debug(self.path2)
                             if self.path2[0] in validMoves:
                                 action = self.move(self.path2[0])
                                 self.path2.pop(0)
@@ -333,9 +543,154 @@ class WWAgent:
                     if move in possiblemoves:
                         action = self.move(move)
                         return action
-        print("no more safe rooms to explore")
+        wwlog.info("no more safe rooms to explore")
         return 'exit'
 
+    # model checks every unvisited room in 'possiblemoves' with a single enumeration of 'symbols'
+    # updates ptable and unvisited and returns the list of valid moves
+    def checkMoves(self, possiblemoves, symbols):
+        validMoves = []
+        checkRooms = []
+        for move in possiblemoves:
+            if move not in self.visited:
+                checkRooms.append(move)
+        probs = self.safeProbabilities(checkRooms, symbols)
+        if wwlog.sinks:
+            wwlog.event('probabilities', position=list(self.position),
+                        probs=[[room[0], room[1], prob] for room, prob in probs.items()])
+        for move in possiblemoves:
+            # all visited rooms were previously model checked and are safe
+            if move in self.visited:
+                validMoves.append(move)
+            else:
+                if move in self.unvisited:
+                    validMoves.insert(0, move)
+                #calculate probability and update table
+                prob = probs[move]
+                if prob is not None:
+                    if self.ptable[move[0]][move[1]] != 0.0:
+                        self.ptable[move[0]][move[1]] = prob
+                    wwlog.debug(self.ptable)
+                    if prob == 1.0:
+                        if move not in self.unvisited:
+                            self.unvisited.insert(0, move)
+                    else:
+                        self.unvisited.append(move)
+                else:
+                    wwlog.debug("room ", move, " safe in no models")
+        # the frontier engine also has new probabilities for unvisited rooms away from the agent
+        for move in self.unvisited:
+            if move not in possiblemoves and probs.get(move) is not None:
+                if self.ptable[move[0]][move[1]] != 0.0:
+                    self.ptable[move[0]][move[1]] = probs[move]
+        return validMoves
+
+    # probability that each room in 'rooms' is safe, None for a room that is safe in no models
+    # may also hold probabilities for other unvisited rooms, depending on the engine
+    # inference only runs again once updateKB has added to the KB, e.g. not when the agent is back in a visited room
+    def safeProbabilities(self, rooms, symbols):
+        if self.dirty:
+            self.probs = {}
+            self.dirty = False
+        probsKey = (self.position, tuple(rooms))
+        probs = self.probs.get(probsKey)
+        if probs is not None:
+            if self.profile is not None:
+                self.profile.count('cacheHits')
+            return probs
+        if self.cache is None:
+            probs = self.computeProbabilities(rooms, symbols)
+        else:
+            # the frontier engine reads the percepts of all visited rooms, the others only the KB around the agent
+            # the cache is shared by agents of every grid size, and the rooms that can hold a pit depend on the size
+            if self.engine == 'frontier':
+                key = (self.engine, self.size, self.position, self.kb.frozen(), frozenset(rooms), frozenset(self.visited))
+            else:
+                key = (self.engine, self.size, self.position, self.kb.frozen(), frozenset(rooms))
+            probs = self.cache.get(key)
+            if probs is None:
+                probs = self.computeProbabilities(rooms, symbols)
+                self.cache.put(key, probs)
+            elif self.profile is not None:
+                self.profile.count('cacheHits')
+        self.probs[probsKey] = probs
+        return probs
+
+    # safeProbabilities without the cache
+    def computeProbabilities(self, rooms, symbols):
+        if self.profile is not None:
+            self.profile.count('inferences')
+        if self.engine == 'frontier':
+            return self.frontierProbabilities()
+        # alpha for each room is that wumpus is not in that room and pit is not in that room
+        alphas = []
+        for room in rooms:
+            alphas.append([(roomSymbol('w', room), False), (roomSymbol('p', room), False)])
+        safeCounts = self.modelcheckAll(symbols, self.kb, alphas)
+        probs = {}
+        for i in range(len(rooms)):
+            if self.n != 0:
+                probs[rooms[i]] = safeCounts[i]/self.n
+            else:
+                probs[rooms[i]] = None
+        return probs
+
+    # probability that each unvisited room is safe, using the percepts of every visited room instead of a 5 room window
+    # pits are independent with PIT_PROBABILITY and there is exactly one wumpus, in any room but the start
+    # breezes and stenches follow from the pits and the wumpus, so only pits next to a breeze are enumerated
+    # the breezes, stenches and unknown rooms are collected by updateKB, and a group of breezes is only counted again once it changes
+    def frontierProbabilities(self):
+        # pits
+        pitProbs = {}
+        for room in self.unknown:
+            if room in self.noPit:
+                pitProbs[room] = 0.0
+            else:
+                pitProbs[room] = PIT_PROBABILITY
+        constraints = []
+        for rooms in self.breezes:
+            constraints.append([room for room in rooms if room in pitProbs and room not in self.noPit])
+        for component, componentConstraints in pitComponents(constraints):
+            key = (tuple(component), tuple([tuple(constraint) for constraint in componentConstraints]))
+            if key in self.pitGroups:
+                componentProbs = self.pitGroups[key]
+            elif len(component) <= FRONTIER_EXACT_ROOMS:
+                componentProbs = countPits(component, componentConstraints, PIT_PROBABILITY)
+            else:
+                componentProbs = countPitsLocal(component, componentConstraints, PIT_PROBABILITY)
+            self.pitGroups[key] = componentProbs
+            if componentProbs is None:
+                pitProbs = None
+                break
+            pitProbs.update(componentProbs)
+        # wumpus, every room that agrees with all stenches is equally likely
+        wumpusRooms = self.wumpusRooms & self.unknown
+        probs = {}
+        for room in self.unknown:
+            if pitProbs is None or not wumpusRooms:
+                probs[room] = None
+            elif room in wumpusRooms:
+                probs[room] = (1 - pitProbs[room]) * (1 - 1/len(wumpusRooms))
+            else:
+                probs[room] = 1 - pitProbs[room]
+        return probs
+
+    # sets self.n to the number of models that follow the KB and returns the number of safe models (m) for each alpha
+    # all alphas share one enumeration, as the models only differ in which alphas they satisfy
+    def modelcheckAll(self, symbols, KB, alphas):
+        if self.engine == 'bitmask':
+            self.n, safeCounts = countBitmask(symbols, KB, self.position, alphas, self.size)
+        elif self.engine == 'propagate':
+            self.n, safeCounts = countPropagate(symbols, KB, self.position, alphas, self.size)
+        else:
+            safeCounts = [0 for alpha in alphas]
+            self.n = self.countTruthtable(symbols, [], KB, alphas, safeCounts, self.profile)
+            engineStats.leaves += 1 << len(symbols)
+        if self.profile is not None:
+            self.profile.count('models', self.n)
+            self.profile.count('safe', sum(safeCounts))
+        return safeCounts
+
     # returns true if wumpus and pit are not in given room in the model
     def isSafe(self, alpha, model):
         isSafe = True
@@ -344,144 +699,378 @@ class WWAgent:
                 isSafe = False
         return isSafe
 
-    # enumerates truth tables for models, and checks
-    def modelcheck(self, symbols, model, KB, alpha):
+    # truth table enumeration shared by all alphas, adds the safe models for alphas[i] to safeCounts[i]
+    # returns the number of models that follow the KB
+    # profile, an AgentProfile, times the isTrueRules and isTrueKB checks of the leaves
+    def countTruthtable(self, symbols, model, KB, alphas, safeCounts, profile=None):
         if len(symbols)==0:
-            #print("-----------------------------------")
-            #print(model)
-            if isTrueRules(model, self.position): # checks if model obeys rules of the game
-                if isTrueKB(model, self.kb): # check if model obeys senses
-                    self.n+=1
-                    if self.isSafe(alpha, model): # check if model is safe for room (given by alpha is true)
-                        self.m+=1
-                        return self.isSafe(alpha, model)
-                    else:                         
-                        return True
-                else: # if model doesn't obey rules, model disregarded
-                    return True
-            else: # if model doesn't obey rules, model disregarded
-                return True
-        else:
-            p = symbols[0]
-            rest = list(symbols[1:len(symbols)])
-            return self.modelcheck(rest,model+[(p,True)],KB,alpha) and self.modelcheck(rest,model+[(p,False)],KB,alpha)
-
-# provided isTrue function
-# checks validity of propositional phrases
-# modified to include 'n'+symbol propositions
-def isTrue(prop,model):
-    #Check whether prop is true in model
-    # assumes prop and model use the list/logic notation
-    if isinstance(prop,str):
-        if ((prop, True) not in model) and ((prop, False) not in model) and (('n'+prop, True) not in model) and (('n'+prop, False) not in model):
-            return True
-        elif prop.startswith('n'):
-            return not isTrue(prop[1:len(prop)],model)
-        else:
-            return (prop,True) in model
-    elif len(prop)==1:
-        return isTrue(prop[0],model)
-    elif prop[1]=='and':
-        return isTrue(prop[0],model) and isTrue(prop[2],model)
-    elif prop[1]=='or':
-        return isTrue(prop[0],model) or isTrue(prop[2],model)
-    elif prop[1]=='implies':
-        return (not isTrue(prop[0],model)) or isTrue(prop[2],model)
-    elif prop[1]=='iff':
-        left = (not isTrue(prop[0],model)) or isTrue(prop[2],model)
-        right= (not isTrue(prop[2],model)) or isTrue(prop[0],model)
-        print(left,right)
-        return (left and right)
-    return False
+            if profile is None:
+                follows = isTrueRules(model, self.position, self.size) and isTrueKB(model, KB)
+            else:
+                follows = profile.timed('isTrueRules', isTrueRules, model, self.position, self.size) and \
+                          profile.timed('isTrueKB', isTrueKB, model, KB)
+            if follows:
+                for i in range(len(alphas)):
+                    if self.isSafe(alphas[i], model):
+                        safeCounts[i] += 1
+                return 1
+            return 0
+        p = symbols[0]
+        rest = list(symbols[1:len(symbols)])
+        return self.countTruthtable(rest,model+[(p,True)],KB,alphas,safeCounts,profile) + self.countTruthtable(rest,model+[(p,False)],KB,alphas,safeCounts,profile)
+
+# splits the breeze constraints into groups that share no rooms, so the pits of each group can be enumerated on their own
+# returns a list of (rooms, constraints) pairs
+def pitComponents(constraints):
+    components = []
+    for constraint in constraints:
+        rooms = set(constraint)
+        group = [constraint]
+        rest = []
+        for component in components:
+            if component[0] & rooms:
+                rooms |= component[0]
+                group += component[1]
+            else:
+                rest.append(component)
+        components = rest + [(rooms, group)]
+    return [(sorted(rooms), group) for rooms, group in components]
+
+# probability of a pit in each of 'rooms', given that every constraint (list of rooms) has at least one pit
+# assignments are weighted by the pit prior, returns None if no assignment meets the constraints
+def countPits(rooms, constraints, prior):
+    index = {}
+    for i in range(len(rooms)):
+        index[rooms[i]] = i
+    # a constraint is checked once the last of its rooms has been assigned
+    checks = [[] for room in rooms]
+    for constraint in constraints:
+        mask = 0
+        last = 0
+        for room in constraint:
+            mask |= 1 << index[room]
+            last = max(last, index[room])
+        checks[last].append(mask)
+    total = 0.0
+    pitWeights = [0.0 for room in rooms]
+    leaves = 0
+    stack = [(0, 0, 1.0)]
+    while stack:
+        depth, pits, weight = stack.pop()
+        if depth == len(rooms):
+            leaves += 1
+            total += weight
+            for i in range(len(rooms)):
+                if pits & (1 << i):
+                    pitWeights[i] += weight
+            continue
+        for pit, pitWeight in ((1 << depth, prior), (0, 1 - prior)):
+            consistent = True
+            for mask in checks[depth]:
+                if not (pits | pit) & mask:
+                    consistent = False
+                    break
+            if consistent:
+                stack.append((depth + 1, pits | pit, weight * pitWeight))
+    engineStats.leaves += leaves
+    if total == 0:
+        return None
+    probs = {}
+    for i in range(len(rooms)):
+        probs[rooms[i]] = pitWeights[i] / total
+    return probs
+
+# estimate of countPits for groups too large to enumerate, which only happen on large worlds
+# the pit probability of each room is counted exactly over the constraints it is part of and their rooms
+def countPitsLocal(rooms, constraints, prior):
+    probs = {}
+    for room in rooms:
+        localConstraints = [constraint for constraint in constraints if room in constraint]
+        localRooms = set()
+        for constraint in localConstraints:
+            localRooms.update(constraint)
+        localProbs = countPits(sorted(localRooms), localConstraints, prior)
+        if localProbs is None:
+            return None
+        probs[room] = localProbs[room]
+    return probs
 
 # check if model follows all known values in the KB
 def isTrueKB(model, kb):
     for prop, val in model:
         if val == False:
-            if prop in kb:
+            if kb.isKnownTrue(prop):
                 return False
         elif val == True:
-            if 'n'+prop in kb:
+            if kb.isKnownFalse(prop):
                 return False
     return True
 
-# if alpha is more than two symbols, created nested alpha
-# e.g. [ 's11', 'and', ['s12', 'and', 's01]]
-def cleanAlpha(a, prop):
-    if len(a) == 0:
-        return a
-    elif len(a) == 1:
-        return a[0]
-    elif len(a) == 2:
-        return [a[0], prop, a[1]]
-    else:
-        return [a[0], prop, cleanAlpha(a[1:], prop)]
-    
-# gets all the adjacent rooms of 'currentRoom'
-def getSurroundingRooms(currentRoom):
-    nextPosMoves = []
-    if currentRoom[0] > 0:
-        nextPosMoves.append((currentRoom[0]-1, currentRoom[1]))
-    if currentRoom[0] < 3:
-        nextPosMoves.append((currentRoom[0]+1, currentRoom[1]))
-    if currentRoom[1] > 0:
-        nextPosMoves.append((currentRoom[0], currentRoom[1]-1))
-    if currentRoom[1] < 3:
-        nextPosMoves.append((currentRoom[0], currentRoom[1]+1))
-    return nextPosMoves
-
-# create an alpha list based on given params - example format: [ 's11', 'and', 's12']
-def createAlpha(rooms, symbol, prop):
-    alpha = []
-    for room in rooms:
-        temp = symbol + str(room[0]) + str(room[1])
-        alpha.append(temp)
-        alpha2 = cleanAlpha(alpha, prop)
-    return alpha2
+# gets all the adjacent rooms of 'currentRoom' in a world of size (cols, rows)
+# as a tuple shared by every caller, from the wwgrid.GridTopology of that size
+def getSurroundingRooms(currentRoom, size=(4, 4)):
+    return wwgrid.getGrid(size[1], size[0]).surrounding[currentRoom]
 
 # appends symbol to the kb if prop not already in there
-# and if not(prop) not already in there 
+# and if not(prop) not already in there, returns true if it was added
 def addToKB(prop, kb):
-    if prop not in kb:
-        if ('n'+prop) not in kb:
-            kb.append(prop)
+    return kb.add(prop)
 
 # check model to see if there are breezes in rooms around pits, 
 # and pits whenever breezes and ditto for wumpus/stenches
 # and checks that there is max one wumpus in model
 # returns false if any are false
-def isTrueRules(model, position):
-    isCorrect = True
-    # check rules
+# symbols missing from the model are treated as true, as isTrue does
+def isTrueRules(model, position, size=(4, 4)):
+    table = getRuleTable(size)
+    values = dict(model)
     wumpusCount = 0
     for symbol, value in model:
-        if isCorrect is False: # returns false after first false returned from isTrue
+        if value == True:
+            kind, room, related = table[symbol]
+            if kind == 'p' or kind == 'w':
+                if kind == 'w':
+                    wumpusCount += 1
+                    if wumpusCount > 1:
+                        return False # model is false is there is more than one wumpus in model
+                # breezes/stenches in all surrounding rooms
+                for r in related:
+                    if not values.get(r, True):
+                        return False
+            elif room == position:
+                # at least one pit/wumpus in a surrounding room
+                isCorrect = False
+                for r in related:
+                    if values.get(r, True):
+                        isCorrect = True
+                        break
+                if not isCorrect:
+                    return False
+    return True
+
+# symbol of a pit ('p'), breeze ('b'), stench ('s') or wumpus ('w') in room (x, y), e.g. 'p03'
+# coordinates of 10 or more are separated by an underscore, e.g. 'p3_12', so every symbol names one room
+def roomSymbol(kind, room):
+    if room[0] < 10 and room[1] < 10:
+        return kind + str(room[0]) + str(room[1])
+    return kind + str(room[0]) + '_' + str(room[1])
+
+# symbols of every room, one tuple per grid size (cols, rows), pits first, then breezes, stenches and wumpuses
+symbolLists = {}
+
+def getSymbols(size):
+    symbols = symbolLists.get(size)
+    if symbols is None:
+        symbols = tuple([roomSymbol(kind, (x, y)) for kind in 'pbsw' for x in range(size[0]) for y in range(size[1])])
+        symbolLists[size] = symbols
+    return symbols
+
+# symbols of each room (pit, breeze, stench, wumpus), one dict per grid size (cols, rows)
+roomSymbolTables = {}
+
+def getRoomSymbols(size):
+    table = roomSymbolTables.get(size)
+    if table is None:
+        table = {}
+        for x in range(size[0]):
+            for y in range(size[1]):
+                table[(x, y)] = tuple([roomSymbol(kind, (x, y)) for kind in 'pbsw'])
+        roomSymbolTables[size] = table
+    return table
+
+# rule tables, one per grid size (cols, rows), mapping each symbol to (kind, room, related symbols)
+# the related symbols are the breezes/stenches around a pit/wumpus, or the pits/wumpuses around a breeze/stench
+ruleTables = {}
+
+def getRuleTable(size):
+    table = ruleTables.get(size)
+    if table is None:
+        table = {}
+        grid = wwgrid.getGrid(size[1], size[0])
+        for x in range(size[0]):
+            for y in range(size[1]):
+                rooms = grid.surrounding[(x, y)]
+                for kind, relatedKind in (('p', 'b'), ('b', 'p'), ('w', 's'), ('s', 'w')):
+                    related = tuple([roomSymbol(relatedKind, room) for room in rooms])
+                    table[roomSymbol(kind, (x, y))] = (kind, (x, y), related)
+        ruleTables[size] = table
+    return table
+
+# counts the models over 'symbols' that follow the KB and the rules, and the safe ones for each alpha
+# the KB fixes the value of its known symbols, so only the remaining (free) bits are enumerated
+# returns (n, [m for each alpha])
+def countBitmask(symbols, kb, position, alphas, size=(4, 4)):
+    safeCounts = [0 for alpha in alphas]
+    compiled = compileModel(symbols, kb, position, size)
+    if compiled is None: # KB contradicts itself, no model follows it
+        return (0, safeCounts)
+    kbValue, freeMask, allRules, anyRules, wumpusMask = compiled
+    safes = []
+    for i in range(len(alphas)):
+        safe = compileAlpha(symbols, alphas[i])
+        if safe is not None:
+            safes.append((i, safe[0], safe[1]))
+    engineStats.leaves += 1 << bin(freeMask).count('1')
+    n = 0
+    sub = freeMask
+    while True:
+        model = sub | kbValue
+        if isTrueRulesBitmask(model, allRules, anyRules, wumpusMask):
+            n += 1
+            for i, mask, value in safes:
+                if model & mask == value:
+                    safeCounts[i] += 1
+        if sub == 0:
+            break
+        sub = (sub - 1) & freeMask
+    return (n, safeCounts)
+
+# same counts as countBitmask, but models are built one symbol at a time and a partial model is
+# dropped as soon as it breaks a rule, so inconsistent subtrees are never expanded
+# the symbols known by the KB are fixed before the search starts
+def countPropagate(symbols, kb, position, alphas, size=(4, 4)):
+    safeCounts = [0 for alpha in alphas]
+    compiled = compileModel(symbols, kb, position, size)
+    if compiled is None: # KB contradicts itself, no model follows it
+        return (0, safeCounts)
+    kbValue, freeMask, allRules, anyRules, wumpusMask = compiled
+    safes = []
+    for i in range(len(alphas)):
+        safe = compileAlpha(symbols, alphas[i])
+        if safe is not None:
+            safes.append((i, safe[0], safe[1]))
+    kbMask = ((1 << len(symbols)) - 1) & ~freeMask
+    if not isPartialTrueRules(kbMask, kbValue, allRules, anyRules, wumpusMask):
+        return (0, safeCounts)
+    # assign pits and wumpuses first, as they trigger the rules, and keep for each symbol only the rules it is part of
+    bits = []
+    for i, s in enumerate(symbols):
+        if freeMask & (1 << i):
+            if s.startswith('p') or s.startswith('w'):
+                bits.insert(0, 1 << i)
+            else:
+                bits.append(1 << i)
+    checks = []
+    for bit in bits:
+        bitAllRules = [rule for rule in allRules if (rule[0] | rule[1]) & bit]
+        bitAnyRules = [rule for rule in anyRules if (rule[0] | rule[1]) & bit]
+        checks.append((bit, bitAllRules, bitAnyRules, wumpusMask if bit & wumpusMask else 0))
+    n = 0
+    # depth first search over the free symbols, 'assigned' holds the bits with a value so far
+    stack = [(0, kbMask, kbValue)]
+    while stack:
+        depth, assigned, model = stack.pop()
+        if depth == len(checks):
+            n += 1
+            for i, mask, value in safes:
+                if model & mask == value:
+                    safeCounts[i] += 1
+            continue
+        bit, bitAllRules, bitAnyRules, bitWumpusMask = checks[depth]
+        assigned |= bit
+        if isPartialTrueRules(assigned, model, bitAllRules, bitAnyRules, 0):
+            stack.append((depth + 1, assigned, model))
+        if isPartialTrueRules(assigned, model | bit, bitAllRules, bitAnyRules, bitWumpusMask):
+            stack.append((depth + 1, assigned, model | bit))
+    engineStats.leaves += n # every complete model follows the rules, the others were pruned
+    return (n, safeCounts)
+
+# checks the rules on a partial model, where only the bits in 'assigned' have a value
+# returns false only if a rule is already broken whatever the value of the other bits
+def isPartialTrueRules(assigned, model, allRules, anyRules, wumpusMask):
+    wumpus = model & wumpusMask
+    if wumpus & (wumpus - 1): # more than one wumpus
+        return False
+    for bit, mask in allRules:
+        if model & bit and assigned & mask & ~model:
+            return False
+    for bit, mask in anyRules:
+        if model & bit and assigned & mask == mask and not model & mask:
             return False
-        if ('b' in symbol) and (value == True): # rooms where there is a breeze
-            coords = (int(symbol[1]), int(symbol[2]))
-            if coords == position:
-                rooms = getSurroundingRooms(coords) # get rooms surrounding the breeze
-                alpha = createAlpha(rooms, 'p', 'or')
-                isCorrect = isTrue(alpha, model) # checks if there is at least one pit
-        if ('p' in symbol) and (value == True): # rooms where there is a pit
-            coords = (int(symbol[1]), int(symbol[2]))
-            rooms = getSurroundingRooms(coords) # get rooms surrounding the pit
-            alpha = createAlpha(rooms, 'b', 'and') # creates alpha for if there are breezes in all surrounding checked rooms
-            isCorrect = isTrue(alpha, model) 
-        if ('s' in symbol) and (value == True): # rooms where there is a stench
-            coords = (int(symbol[1]), int(symbol[2]))
-            if coords == position:
-                rooms = getSurroundingRooms(coords) # get rooms surrounding the stench
-                alpha = createAlpha(rooms, 'w', 'or') # creates alpha for if there is a wumpus in surrounding room
-                isCorrect = isTrue(alpha, model) 
-        if ('w' in symbol) and (value == True): # rooms where there is a wumpus
-            wumpusCount += 1
-            if wumpusCount > 1:
-                return False # model is false is there is more than one wumpus in model
-            coords = (int(symbol[1]), int(symbol[2]))
-            rooms = getSurroundingRooms(coords) # get rooms surrounding the wumpus
-            alpha = createAlpha(rooms, 's', 'and') # creates alpha for if there is a stench in all surrounding checked rooms
-            isCorrect = isTrue(alpha, model)
-    return isCorrect
+    return True
+
+# compile the KB and the rules checked by isTrueRules into bitmasks over 'symbols'
+# returns (kbValue, freeMask, allRules, anyRules, wumpusMask), or None if the KB has both prop and 'n'+prop
+#   kbValue    - bits of the symbols the KB knows to be true
+#   freeMask   - bits of the symbols the KB says nothing about
+#   allRules   - (bit, mask) pairs, if bit is set then every bit in mask must be set (pit -> breezes)
+#   anyRules   - (bit, mask) pairs, if bit is set then at least one bit in mask must be set (breeze -> pit)
+#   wumpusMask - bits of the wumpus symbols, at most one can be set
+def compileModel(symbols, kb, position, size=(4, 4)):
+    kbMask = 0
+    kbValue = 0
+    for i, s in enumerate(symbols):
+        if kb.isKnownTrue(s):
+            if kb.isKnownFalse(s):
+                return None
+            kbMask |= 1 << i
+            kbValue |= 1 << i
+        elif kb.isKnownFalse(s):
+            kbMask |= 1 << i
+    freeMask = ((1 << len(symbols)) - 1) & ~kbMask
+    allRules, anyRules, wumpusMask = compileRules(tuple(symbols), position, size)
+    return (kbValue, freeMask, allRules, anyRules, wumpusMask)
+
+# rule masks for each list of symbols and position, they don't depend on the KB so are only built once
+ruleMasks = {}
+
+def compileRules(symbols, position, size):
+    key = (symbols, position, size)
+    if key in ruleMasks:
+        return ruleMasks[key]
+    table = getRuleTable(size)
+    index = {}
+    for i, s in enumerate(symbols):
+        index[s] = i
+    allRules = []
+    anyRules = []
+    wumpusMask = 0
+    for i, s in enumerate(symbols):
+        kind, room, related = table[s]
+        if kind == 'p' or kind == 'w':
+            if kind == 'w':
+                wumpusMask |= 1 << i
+            # symbols missing from the model are treated as true by isTrue, so only present ones are required
+            mask = 0
+            for r in related:
+                if r in index:
+                    mask |= 1 << index[r]
+            allRules.append((1 << i, mask))
+        elif room == position:
+            # a breeze/stench in the current room needs a pit/wumpus next to it,
+            # which is always true if one of the neighbouring symbols is missing from the model
+            mask = 0
+            for r in related:
+                if r not in index:
+                    mask = None
+                    break
+                mask |= 1 << index[r]
+            if mask is not None:
+                anyRules.append((1 << i, mask))
+    ruleMasks[key] = (allRules, anyRules, wumpusMask)
+    return ruleMasks[key]
 
+# (mask, value) pair a model must match for every (prop, val) in alpha to hold, None if alpha can never hold
+def compileAlpha(symbols, alpha):
+    mask = 0
+    value = 0
+    for prop, val in alpha:
+        if prop not in symbols:
+            return None
+        mask |= 1 << symbols.index(prop)
+        if val:
+            value |= 1 << symbols.index(prop)
+    return (mask, value)
 
+# bitmask version of isTrueRules for models built by countBitmask
+def isTrueRulesBitmask(model, allRules, anyRules, wumpusMask):
+    wumpus = model & wumpusMask
+    if wumpus & (wumpus - 1): # more than one wumpus
+        return False
+    for bit, mask in allRules:
+        if model & bit and model & mask != mask:
+            return False
+    for bit, mask in anyRules:
+        if model & bit and not model & mask:
+            return False
+    return True
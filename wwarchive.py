@@ -0,0 +1,232 @@
+
+'''Wumpus World Trace Archive'''
+#
+# Append-only archive of episode traces from any number of runs, with a fixed-size index
+# so episodes can be found and filtered without reading the traces themselves.
+#
+# an archive NAME is two files:
+#   NAME       a wwtrace.py trace file, the episodes back to back
+#   NAME.idx   'WWAI', version byte, 3 pad bytes, then one INDEX_RECORD per episode in the order appended
+# both are read through mmap, and an episode is only decoded when it is asked for
+#
+# append a batch with:
+# python3 wwbatch.py -episodes 10000 -seed 3 -archive runs.wwa
+# and find, e.g., the episodes where the agent fell into a pit after more than 20 moves:
+# python3 wwarchive.py runs.wwa -outcome pit -minsteps 21
+
+
+import os
+import mmap
+import struct
+import argparse
+from collections import namedtuple
+
+import wwtrace
+
+INDEX_MAGIC = b'WWAI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sB3x')
+# seed, offset, length, episodeId, steps, score, outcome code, rows, cols, flags
+INDEX_RECORD = struct.Struct('<qQIIIiBBBB')
+
+# One index record, offset and length locate the episode in the trace file
+IndexEntry = namedtuple('IndexEntry', ['seed', 'offset', 'length', 'episodeId', 'steps', 'score', 'outcome', 'rows', 'cols'])
+
+class TraceArchive:
+
+    # opens the archive at 'path', mode 'r' to read or 'a' to also append, creating the archive if needed
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.indexPath = path + '.idx'
+        self.mode = mode
+        self.dataFile = None
+        self.indexFile = None
+        self.data = None
+        self.index = None
+        self.mapped = False
+        if mode == 'a':
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(wwtrace.FILE_HEADER.pack(wwtrace.MAGIC, wwtrace.VERSION))
+                with open(self.indexPath, 'wb') as f:
+                    f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION))
+            self.dataFile = open(path, 'r+b')
+            self.indexFile = open(self.indexPath, 'r+b')
+        elif mode != 'r':
+            raise ValueError('Archive mode must be \'r\' or \'a\', not ' + repr(mode))
+        self.check_headers()
+        self.refresh()
+
+    def check_headers(self):
+        with open(self.path, 'rb') as f:
+            magic, version = wwtrace.FILE_HEADER.unpack(f.read(wwtrace.FILE_HEADER.size))
+        if magic != wwtrace.MAGIC or version != wwtrace.VERSION:
+            raise ValueError(self.path + ' is not a Wumpus World trace file of version ' + str(wwtrace.VERSION))
+        with open(self.indexPath, 'rb') as f:
+            magic, version = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(self.indexPath + ' is not a Wumpus World archive index of version ' + str(INDEX_VERSION))
+
+    # maps the files again, to see the episodes appended since they were mapped
+    def refresh(self):
+        self.unmap()
+        self.data = mapFile(self.path)
+        self.index = mapFile(self.indexPath)
+        # an index record written after its episode is only trusted if the whole episode is there,
+        # so an append cut short leaves the archive as it was before it
+        count = (len(self.index) - INDEX_HEADER.size) // INDEX_RECORD.size
+        while count > 0:
+            offset, length = INDEX_RECORD.unpack_from(self.index, INDEX_HEADER.size + (count - 1) * INDEX_RECORD.size)[1:3]
+            if offset + length <= len(self.data):
+                break
+            count -= 1
+        self.count = count
+        self.byId = None
+        self.mapped = True
+
+    def unmap(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+    # appends an episode encoded by wwtrace.EpisodeRecorder, the episode first and then its index record
+    def append(self, data):
+        if self.indexFile is None:
+            raise ValueError('Archive is open for reading only')
+        fields = wwtrace.EPISODE_HEADER.unpack_from(data)
+        rows, cols, flags, outcome, seed, episodeId, wumpusRoom, goldRoom, score, steps = fields
+        offset = self.dataFile.seek(0, os.SEEK_END)
+        self.dataFile.write(data)
+        self.dataFile.flush()
+        # records past the last complete episode are left over from an append that was cut short
+        self.indexFile.seek(INDEX_HEADER.size + self.count * INDEX_RECORD.size)
+        self.indexFile.truncate()
+        self.indexFile.write(INDEX_RECORD.pack(seed, offset, len(data), episodeId, steps, score, outcome, rows, cols, flags))
+        self.indexFile.flush()
+        self.count += 1
+        self.mapped = False # the maps end before this episode
+
+    # so the archive can be given to wwbatch.runBatch in place of a wwtrace.TraceWriter
+    def write_episode(self, data):
+        self.append(data)
+
+    # appends every episode of a trace file, returns how many
+    def append_trace(self, file):
+        episodes = 0
+        buffer = mapFile(file)
+        try:
+            offset = wwtrace.FILE_HEADER.size
+            while offset < len(buffer):
+                trace, end = wwtrace.decodeEpisode(buffer, offset)
+                self.append(buffer[offset:end])
+                offset = end
+                episodes += 1
+        finally:
+            buffer.close()
+        return episodes
+
+    def __len__(self):
+        return self.count
+
+    # the index records, in the order the episodes were appended
+    def entries(self):
+        if not self.mapped:
+            self.refresh()
+        end = INDEX_HEADER.size + self.count * INDEX_RECORD.size
+        for seed, offset, length, episodeId, steps, score, outcome, rows, cols, flags in \
+                INDEX_RECORD.iter_unpack(self.index[INDEX_HEADER.size:end]):
+            if not flags & wwtrace.HAS_SEED:
+                seed = None
+            yield IndexEntry(seed, offset, length, episodeId, steps, score, wwtrace.OUTCOMES[outcome], rows, cols)
+
+    # index records matching every condition given, read from the index only
+    # e.g. select(outcome='pit', minSteps=21) for the episodes ending in a pit after more than 20 moves
+    def select(self, outcome=None, minSteps=None, maxSteps=None, minScore=None, maxScore=None, seed=None, size=None):
+        selected = []
+        for entry in self.entries():
+            if outcome is not None and entry.outcome != outcome:
+                continue
+            if minSteps is not None and entry.steps < minSteps:
+                continue
+            if maxSteps is not None and entry.steps > maxSteps:
+                continue
+            if minScore is not None and entry.score < minScore:
+                continue
+            if maxScore is not None and entry.score > maxScore:
+                continue
+            if seed is not None and entry.seed != seed:
+                continue
+            if size is not None and (entry.rows, entry.cols) != size:
+                continue
+            selected.append(entry)
+        return selected
+
+    # index record of an episode, by its ID and, as IDs repeat across runs, its seed
+    # with no seed given the episode appended last with that ID is found
+    def find(self, episodeId, seed=None):
+        if not self.mapped:
+            self.refresh()
+        if self.byId is None:
+            self.byId = {}
+            for entry in self.entries():
+                self.byId[(entry.episodeId, entry.seed)] = entry
+                self.byId[(entry.episodeId, None)] = entry
+        return self.byId.get((episodeId, seed))
+
+    # wwtrace.EpisodeTrace of an index record, decoded from the mapped trace file
+    def episode(self, entry):
+        if not self.mapped:
+            self.refresh()
+        return wwtrace.decodeEpisode(self.data, entry.offset)[0]
+
+    def close(self):
+        self.unmap()
+        if self.dataFile is not None:
+            self.dataFile.close()
+            self.indexFile.close()
+            self.dataFile = None
+            self.indexFile = None
+
+# read only mmap of a whole file, trace and index files are never empty as they start with a header
+def mapFile(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Filter, replay or add to a Wumpus World trace archive.')
+    parser.add_argument('archive', help='archive written by wwbatch.py -archive')
+    parser.add_argument('-add', default=None, help='append the episodes of this trace file to the archive')
+    parser.add_argument('-outcome', choices=wwtrace.OUTCOMES, default=None, help='only episodes with this outcome')
+    parser.add_argument('-minsteps', type=int, default=None, help='only episodes of at least this many steps')
+    parser.add_argument('-maxsteps', type=int, default=None, help='only episodes of at most this many steps')
+    parser.add_argument('-minscore', type=int, default=None, help='only episodes scoring at least this')
+    parser.add_argument('-maxscore', type=int, default=None, help='only episodes scoring at most this')
+    parser.add_argument('-seed', type=int, default=None, help='only episodes of this batch seed')
+    parser.add_argument('-replay', type=int, default=None, help='print the replay of the episode with this ID')
+    args = parser.parse_args(argv)
+    if args.add:
+        archive = TraceArchive(args.archive, 'a')
+        print('Added', archive.append_trace(args.add), 'episodes, the archive has', len(archive))
+        archive.close()
+        return
+    archive = TraceArchive(args.archive)
+    try:
+        if args.replay is not None:
+            entry = archive.find(args.replay, args.seed)
+            if entry is None:
+                parser.error('episode ' + str(args.replay) + ' is not in ' + args.archive)
+            wwtrace.printReplay(archive.episode(entry))
+            return
+        selected = archive.select(args.outcome, args.minsteps, args.maxsteps, args.minscore, args.maxscore, args.seed)
+        for entry in selected:
+            print('Episode: ', entry.episodeId, '   Seed: ', entry.seed, '   Outcome: ', entry.outcome,
+                  '   Steps: ', entry.steps, '   Score: ', entry.score)
+        print(len(selected), 'of', len(archive), 'episodes')
+    finally:
+        archive.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+
+'''Wumpus World Batch Runner'''
+#
+# Runs many seeded episodes of the simulation without a display, spread over a pool of
+# worker processes, and prints one summary of the results.
+#
+# run with:
+# python3 wwbatch.py -episodes 1000 -workers 8
+
+
+import os
+import json
+import time
+import argparse
+import statistics
+import multiprocessing
+from functools import partial
+
+import wwlog
+import wwsim
+import wwagent
+import wwagent_v3
+import wwtrace
+import wwarchive
+import wwqtable
+
+AGENTS = {'v1': wwagent.WWAgent, 'v3': wwagent_v3.WWAgent}
+
+# settings of the worker process, set once by initWorker
+workerFactory = None
+workerSeed = None
+workerMaxSteps = None
+workerSize = None
+
+def initWorker(agentFactory, seed, maxSteps, size=(wwsim.ROWS, wwsim.COLUMNS), logLevel=wwlog.QUIET):
+    global workerFactory, workerSeed, workerMaxSteps, workerSize
+    workerFactory = agentFactory
+    workerSeed = seed
+    workerMaxSteps = maxSteps
+    workerSize = size
+    # at the debug level the agents print every decision, which would only slow the workers down
+    wwlog.setLevel(logLevel)
+
+# runs one episode in a worker, its world is determined by the batch seed and the episode ID
+# an agent that raises is recorded with the outcome 'error' and its traceback instead of stopping the whole batch
+def runEpisode(episodeId):
+    try:
+        result = wwsim.run_episode(workerFactory, workerSeed, workerMaxSteps, episodeId, workerSize[0], workerSize[1])
+    except Exception:
+        result = wwsim.errorResult(workerSeed, episodeId)
+    return (episodeId, result)
+
+# runEpisode that also records the episode, returns (episodeId, result, encoded trace or None for an error)
+def runTracedEpisode(episodeId):
+    recorder = wwtrace.EpisodeRecorder()
+    try:
+        result = wwsim.run_episode(workerFactory, workerSeed, workerMaxSteps, episodeId, workerSize[0], workerSize[1],
+                                   recorder)
+    except Exception:
+        result = wwsim.errorResult(workerSeed, episodeId)
+    return (episodeId, result, recorder.data)
+
+# runEpisode with profiled agents, returns (episodeId, result, totals of wwagent.AgentProfile or None for an error)
+def runProfiledEpisode(episodeId):
+    agents = []
+    def agentFactory(cols, rows):
+        agents.append(workerFactory(cols=cols, rows=rows, profile=True))
+        return agents[-1]
+    try:
+        result = wwsim.run_episode(agentFactory, workerSeed, workerMaxSteps, episodeId, workerSize[0], workerSize[1])
+    except Exception:
+        return (episodeId, wwsim.errorResult(workerSeed, episodeId), None)
+    totals = {}
+    for agent in agents:
+        wwagent.addProfileTotals(totals, agent.profile.totals())
+    return (episodeId, result, totals)
+
+# adds the profiles of runProfiledEpisode to 'profile' and returns the (episodeId, result) pairs
+def collectProfiles(outputs, profile):
+    results = []
+    for episodeId, result, totals in outputs:
+        if totals is not None:
+            wwagent.addProfileTotals(profile, totals)
+        results.append((episodeId, result))
+    return results
+
+# writes the traces of runTracedEpisode in the order they come and returns the (episodeId, result) pairs
+def writeTraces(outputs, trace):
+    results = []
+    for episodeId, result, data in outputs:
+        if data is not None:
+            trace.write_episode(data)
+        results.append((episodeId, result))
+    return results
+
+# runs the episodes firstEpisode, firstEpisode+1, ... of the batch 'seed' and returns a list of
+# (episodeId, EpisodeResult) sorted by episode ID, workers=1 runs them in this process
+# size is the (rows, cols) of the worlds and logLevel the wwlog level of the episodes
+# trace, a wwtrace.TraceWriter or wwarchive.TraceArchive, records every episode but the errors in episode ID order
+# profile, a dict, gets the sums of the wwagent.AgentProfile totals of every episode, agentFactory must take profile=True
+def runBatch(agentFactory, episodes, workers=None, seed=0, maxSteps=1000, firstEpisode=0, size=(wwsim.ROWS, wwsim.COLUMNS),
+             logLevel=wwlog.QUIET, trace=None, profile=None):
+    if trace is not None and profile is not None:
+        raise ValueError('A batch can be traced or profiled, not both')
+    episodeIds = range(firstEpisode, firstEpisode + episodes)
+    if workers == 1:
+        level = wwlog.level
+        try:
+            initWorker(agentFactory, seed, maxSteps, size, logLevel)
+            if trace is not None:
+                results = writeTraces(map(runTracedEpisode, episodeIds), trace)
+            elif profile is not None:
+                results = collectProfiles(map(runProfiledEpisode, episodeIds), profile)
+            else:
+                results = [runEpisode(episodeId) for episodeId in episodeIds]
+        finally:
+            wwlog.setLevel(level)
+        return results
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunksize = max(1, episodes // (workers * 16))
+    with multiprocessing.Pool(workers, initWorker, (agentFactory, seed, maxSteps, size, logLevel)) as pool:
+        if trace is not None:
+            # in order, so the trace can be written as the episodes come in
+            results = writeTraces(pool.imap(runTracedEpisode, episodeIds, chunksize), trace)
+        elif profile is not None:
+            results = collectProfiles(pool.imap_unordered(runProfiledEpisode, episodeIds, chunksize), profile)
+            results.sort()
+        else:
+            results = list(pool.imap_unordered(runEpisode, episodeIds, chunksize))
+            results.sort()
+    return results
+
+# value at fraction q of the sorted list 'values'
+def percentile(values, q):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+# summary of a list of (episodeId, EpisodeResult), wallTime is the time taken by the whole batch
+def summarize(results, wallTime):
+    finished = [result for episodeId, result in results if result.outcome != 'error']
+    scores = sorted([result.score for result in finished])
+    times = sorted([result.wallTime for result in finished])
+    steps = [result.steps for result in finished]
+    outcomes = {}
+    for episodeId, result in results:
+        outcomes[result.outcome] = outcomes.get(result.outcome, 0) + 1
+    episodes = len(results)
+    errors = [(episodeId, result.error) for episodeId, result in results if result.outcome == 'error']
+    summary = {
+        'episodes': episodes,
+        'winRate': outcomes.get('gold', 0) / episodes if episodes else 0.0,
+        'outcomes': outcomes,
+        'deaths': {'eaten': outcomes.get('eaten', 0), 'pit': outcomes.get('pit', 0)},
+        'score': {
+            'mean': statistics.mean(scores) if scores else None,
+            'stdev': statistics.pstdev(scores) if scores else None,
+            'min': scores[0] if scores else None,
+            'p5': percentile(scores, 0.05),
+            'p25': percentile(scores, 0.25),
+            'p50': percentile(scores, 0.5),
+            'p75': percentile(scores, 0.75),
+            'p95': percentile(scores, 0.95),
+            'max': scores[-1] if scores else None,
+        },
+        'steps': {'mean': statistics.mean(steps) if steps else None, 'max': max(steps) if steps else None},
+        'episodeTime': {
+            'mean': statistics.mean(times) if times else None,
+            'p50': percentile(times, 0.5),
+            'p95': percentile(times, 0.95),
+            'max': times[-1] if times else None,
+        },
+        'errors': len(errors),
+        # traceback of the first episode that raised, the others are usually the same bug
+        'firstError': {'episodeId': errors[0][0], 'traceback': errors[0][1]} if errors else None,
+        'wallTime': wallTime,
+        'episodesPerSecond': episodes / wallTime if wallTime > 0 else None,
+    }
+    return summary
+
+def printSummary(summary):
+    print('------------------------------------------------------------------')
+    print('Episodes: ', summary['episodes'], '   Win Rate: ', round(summary['winRate'], 4))
+    print('Outcomes: ', summary['outcomes'])
+    print('Deaths:   ', summary['deaths'])
+    score = summary['score']
+    if score['mean'] is not None:
+        print('Score:     mean', round(score['mean'], 2), ' stdev', round(score['stdev'], 2),
+              ' min', score['min'], ' p25', score['p25'], ' p50', score['p50'], ' p75', score['p75'], ' max', score['max'])
+        times = summary['episodeTime']
+        print('Episode time (ms):  mean', round(times['mean'] * 1000, 3), ' p50', round(times['p50'] * 1000, 3),
+              ' p95', round(times['p95'] * 1000, 3), ' max', round(times['max'] * 1000, 3))
+    print('Wall time (s): ', round(summary['wallTime'], 3), '   Episodes/s: ', round(summary['episodesPerSecond'], 1))
+    printFirstError(summary['errors'], summary['firstError'])
+    print('------------------------------------------------------------------')
+
+# number of episodes that raised and the traceback of the first of them, a dict of its 'episodeId' and 'traceback'
+def printFirstError(errors, firstError):
+    if errors:
+        print('Errors: ', errors, '   First in episode', str(firstError['episodeId']) + ':')
+        print(firstError['traceback'].rstrip())
+
+# where the agents' time went, from the profile totals of runBatch
+# engine, if given, marks the sections and counters it does not measure, see wwagent.PROFILE_ENGINES
+def printProfile(profile, engine=None):
+    total = profile.get('time', 0.0)
+    decisions = profile.get('decisions', 0)
+    print('Agent time (s): ', round(total, 3), '   Decisions: ', decisions)
+    for section in wwagent.PROFILE_SECTIONS:
+        seconds = profile.get(section, 0.0)
+        print('  ', section.ljust(12), str(round(seconds, 3)).rjust(10), 's',
+              ('%5.1f%%' % (100 * seconds / total)) if total else '', '   per decision (ms):',
+              round(1000 * seconds / decisions, 4) if decisions else None, *([profileNote(section, engine)] if section in
+              wwagent.PROFILE_ENGINES else []))
+    print('Per decision:  ', '   '.join([counter + ' ' + str(round(profile.get(counter, 0) / decisions, 1) if decisions else None)
+                                         for counter in wwagent.PROFILE_COUNTERS]))
+    notes = [counter + ' ' + profileNote(counter, engine) for counter in wwagent.PROFILE_COUNTERS if profileNote(counter, engine)]
+    if notes:
+        print('   ', ',  '.join(notes))
+    inferences = profile.get('inferences', 0)
+    lookups = inferences + profile.get('cacheHits', 0)
+    if lookups:
+        print('Probabilities from the caches: ', '%.1f%%' % (100 * profile.get('cacheHits', 0) / lookups),
+              '   models and safe only count the', inferences, 'inferences run')
+    print('------------------------------------------------------------------')
+
+# note of a section or counter not measured for every engine, '' if it is
+def profileNote(name, engine=None):
+    engines = wwagent.PROFILE_ENGINES.get(name)
+    if engines is None:
+        return ''
+    if engine is None:
+        return '(' + ', '.join(engines) + ' engines only)'
+    if engine not in engines:
+        return '(not measured by the ' + engine + ' engine)'
+    return ''
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run many Wumpus World episodes across a process pool.')
+    parser.add_argument('-episodes', type=int, default=100, help='number of episodes (default 100)')
+    parser.add_argument('-workers', type=int, default=None, help='number of worker processes (default: all cores)')
+    parser.add_argument('-seed', type=int, default=0, help='seed of the batch, with the episode ID it fixes each world (default 0)')
+    parser.add_argument('-first', type=int, default=0, help='ID of the first episode (default 0)')
+    parser.add_argument('-maxsteps', type=int, default=1000, help='steps before an episode times out (default 1000)')
+    parser.add_argument('-agent', choices=sorted(AGENTS), default='v1', help='agent version (default v1)')
+    parser.add_argument('-engine', choices=wwagent.ENGINES, default='bitmask', help='inference engine of the agent (default bitmask)')
+    parser.add_argument('-size', default='4x4', help='size of the worlds, rooms across x rooms down (default 4x4)')
+    parser.add_argument('-log', choices=sorted(wwlog.LEVELS), default='quiet', help='log level of the episodes (default quiet)')
+    parser.add_argument('-json', default=None, help='also write the summary to this file')
+    parser.add_argument('-qtable', default=None, help='Q-table file of the v3 agent, shared read-only by the workers, see wwsim_v3.py')
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('-trace', default=None, help='record every episode to this trace file, see wwtrace.py')
+    recording.add_argument('-archive', default=None, help='append every episode to this trace archive, see wwarchive.py')
+    recording.add_argument('-profile', action='store_true', help='time the parts of each agent decision and print where the time went')
+    args = parser.parse_args(argv)
+    if args.episodes < 1:
+        parser.error('-episodes must be at least 1')
+    try:
+        size = wwsim.parseSize(args.size, 'wwbatch.py')
+    except Exception as e:
+        parser.error(str(e))
+    if args.qtable and args.agent != 'v3':
+        parser.error('-qtable needs -agent v3')
+    if args.qtable:
+        # mapped read-only, each worker maps the same file instead of getting a copy of the table
+        table = wwqtable.QTable.load(args.qtable)
+        if table.values.shape[0] != size[0] * size[1]:
+            parser.error('The Q-table in ' + args.qtable + ' has ' + str(table.values.shape[0]) + ' states, a ' + str(size[1]) +
+                         'x' + str(size[0]) + ' world needs ' + str(size[0] * size[1]))
+        agentFactory = partial(AGENTS[args.agent], args.engine, qtable=table)
+    else:
+        agentFactory = partial(AGENTS[args.agent], args.engine)
+    start = time.perf_counter()
+    trace = None
+    profile = {} if args.profile else None
+    if args.trace:
+        trace = wwtrace.TraceWriter(args.trace)
+    elif args.archive:
+        trace = wwarchive.TraceArchive(args.archive, 'a')
+    try:
+        results = runBatch(agentFactory, args.episodes, args.workers, args.seed, args.maxsteps, args.first, size,
+                           wwlog.LEVELS[args.log], trace, profile)
+    finally:
+        if trace is not None:
+            trace.close()
+    summary = summarize(results, time.perf_counter() - start)
+    printSummary(summary)
+    if profile is not None:
+        printProfile(profile, args.engine)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+
+'''Wumpus World Batch Simulation'''
+#
+# Runs B worlds in lockstep with NumPy arrays, one action per world per step.
+# Follows the rules of Simulation in wwsim.py (agent_move, update_score and terminal_test),
+# for high-throughput training and evaluation of agents that pick actions for all worlds at once.
+# Needs NumPy.
+
+
+import numpy as np
+
+from wwsim import STENCH, BREEZE, GLITTER, BUMP, SCREAM, PERCEPT_TUPLES
+
+# Action codes
+MOVE = 0
+LEFT = 1
+RIGHT = 2
+GRAB = 3
+SHOOT = 4
+CLIMB = 5
+EXIT = 6
+ACTIONS = ('move', 'left', 'right', 'grab', 'shoot', 'climb', 'exit')
+
+# Facing codes, as in the FACING KEY of wwagent.py
+UP = 0
+RIGHT_FACING = 1
+DOWN = 2
+LEFT_FACING = 3
+FACINGS = ('up', 'right', 'down', 'left')
+
+# Outcome codes, the outcome of a world still running is RUNNING
+RUNNING = 0
+GOLD = 1
+EXITED = 2
+CLIMBED = 3
+EATEN = 4
+PIT = 5
+OUTCOMES = ('running', 'gold', 'exit', 'climbed', 'eaten', 'pit')
+
+# Batch of worlds, world b has its agent at (agentRow[b], agentCol[b]) facing agentFacing[b]
+# rooms are numbered r*colSize + c as in Simulation
+class BatchSimulation:
+
+    def __init__(self, batchSize, rowSize=4, colSize=4, score=0):
+        self.batchSize = batchSize
+        self.rowSize = rowSize
+        self.colSize = colSize
+        self.start = (rowSize - 1, 0)
+        self.pits = np.zeros((batchSize, rowSize * colSize), dtype=bool)
+        self.senses = np.zeros((batchSize, rowSize * colSize), dtype=np.uint8) # stench, breeze and glitter bits
+        self.wumpusRow = np.zeros(batchSize, dtype=np.int32)
+        self.wumpusCol = np.zeros(batchSize, dtype=np.int32)
+        self.goldRow = np.zeros(batchSize, dtype=np.int32)
+        self.goldCol = np.zeros(batchSize, dtype=np.int32)
+        self.initialScore = score
+        self.reset_stats()
+
+    # puts every agent back at the start, keeping the worlds
+    def reset_stats(self):
+        batchSize = self.batchSize
+        self.agentRow = np.full(batchSize, self.start[0], dtype=np.int32)
+        self.agentCol = np.full(batchSize, self.start[1], dtype=np.int32)
+        self.agentFacing = np.full(batchSize, RIGHT_FACING, dtype=np.int8)
+        self.arrow = np.ones(batchSize, dtype=np.int8)
+        self.score = np.full(batchSize, self.initialScore, dtype=np.int64)
+        self.wumpusAlive = np.ones(batchSize, dtype=bool)
+        self.hasGold = np.zeros(batchSize, dtype=bool)
+        self.bump = np.zeros(batchSize, dtype=bool) # bump and scream are only ever felt in the agent's room
+        self.scream = np.zeros(batchSize, dtype=bool)
+        self.lastAction = np.full(batchSize, -1, dtype=np.int8)
+        self.endEpisode = np.zeros(batchSize, dtype=bool)
+        self.done = np.zeros(batchSize, dtype=bool)
+        self.outcome = np.zeros(batchSize, dtype=np.int8)
+        self.steps = np.zeros(batchSize, dtype=np.int32)
+
+    # places the wumpus, gold and pits of every world with the rules of Simulation.generate_simulation:
+    # the wumpus is in any room but the start, the gold in any room but the start and the wumpus room,
+    # and each room but the start has a pit with probability 1/5
+    # rng is a numpy Generator, or a seed for one
+    def generate_simulation(self, rng=None):
+        rng = np.random.default_rng(rng)
+        batchSize = self.batchSize
+        rooms = self.rowSize * self.colSize
+        startRoom = self.start[0] * self.colSize + self.start[1]
+        # uniform over the rooms but the start, by skipping over it
+        wumpus = rng.integers(0, rooms - 1, batchSize)
+        wumpus = wumpus + (wumpus >= startRoom)
+        # uniform over the rooms but the start and the wumpus
+        gold = rng.integers(0, rooms - 2, batchSize)
+        low = np.minimum(wumpus, startRoom)
+        high = np.maximum(wumpus, startRoom)
+        gold = gold + (gold >= low)
+        gold = gold + (gold >= high)
+        pits = rng.integers(1, 6, (batchSize, rooms)) == 3
+        pits[:, startRoom] = False
+        self.set_worlds(wumpus // self.colSize, wumpus % self.colSize, gold // self.colSize, gold % self.colSize, pits)
+
+    # sets the worlds from arrays of wumpus and gold locations and a (batchSize, rooms) array of pits
+    def set_worlds(self, wumpusRow, wumpusCol, goldRow, goldCol, pits):
+        self.wumpusRow = np.asarray(wumpusRow, dtype=np.int32)
+        self.wumpusCol = np.asarray(wumpusCol, dtype=np.int32)
+        self.goldRow = np.asarray(goldRow, dtype=np.int32)
+        self.goldCol = np.asarray(goldCol, dtype=np.int32)
+        self.pits = np.asarray(pits, dtype=bool).reshape(self.batchSize, self.rowSize * self.colSize)
+        # percepts, a stench/breeze in the rooms next to the wumpus/a pit
+        senses = np.zeros((self.batchSize, self.rowSize, self.colSize), dtype=np.uint8)
+        wumpus = np.zeros((self.batchSize, self.rowSize, self.colSize), dtype=bool)
+        wumpus[np.arange(self.batchSize), self.wumpusRow, self.wumpusCol] = True
+        pits = self.pits.reshape(self.batchSize, self.rowSize, self.colSize)
+        for grid, bit in ((wumpus, STENCH), (pits, BREEZE)):
+            near = np.zeros_like(grid)
+            near[:, :-1, :] |= grid[:, 1:, :]
+            near[:, 1:, :] |= grid[:, :-1, :]
+            near[:, :, :-1] |= grid[:, :, 1:]
+            near[:, :, 1:] |= grid[:, :, :-1]
+            senses |= near.astype(np.uint8) * bit
+        senses[np.arange(self.batchSize), self.goldRow, self.goldCol] |= GLITTER
+        self.senses = senses.reshape(self.batchSize, self.rowSize * self.colSize)
+
+    # batch holding the worlds of a list of wwsim Simulations, after generate_simulation
+    @classmethod
+    def from_simulations(cls, sims):
+        batch = cls(len(sims), sims[0].rowSize, sims[0].colSize)
+        pits = np.array([[sim.has_pit(r, c) for r in range(sim.rowSize) for c in range(sim.colSize)] for sim in sims])
+        batch.set_worlds([sim.wumpusLoc[0] for sim in sims], [sim.wumpusLoc[1] for sim in sims],
+                         [sim.goldLocation[0] for sim in sims], [sim.goldLocation[1] for sim in sims], pits)
+        return batch
+
+    # percept bits of the room each agent is in, one uint8 per world
+    def percept_bits(self):
+        room = self.agentRow * self.colSize + self.agentCol
+        bits = self.senses[np.arange(self.batchSize), room]
+        return bits | (self.bump.astype(np.uint8) * BUMP) | (self.scream.astype(np.uint8) * SCREAM)
+
+    # percept tuple of world b, as Simulation.get_percepts gives it to an agent
+    def get_percepts(self, b):
+        return PERCEPT_TUPLES[int(self.percept_bits()[b])]
+
+    # applies one action code per world, worlds that are done ignore their action
+    def agent_move(self, actions):
+        actions = np.asarray(actions, dtype=np.int8)
+        active = ~self.done
+        exiting = active & (actions == EXIT)
+        self.endEpisode |= exiting
+        active = active & ~exiting
+        self.lastAction = np.where(active, actions, self.lastAction).astype(np.int8)
+        self.steps += active | exiting
+        self.score -= np.where(active, np.where(actions == SHOOT, 10, 1), 0)
+        row = self.agentRow
+        col = self.agentCol
+        facing = self.agentFacing
+        # move forward, or bump into the wall
+        moving = active & (actions == MOVE)
+        newRow = row + np.where(facing == DOWN, 1, 0) - np.where(facing == UP, 1, 0)
+        newCol = col + np.where(facing == RIGHT_FACING, 1, 0) - np.where(facing == LEFT_FACING, 1, 0)
+        inside = (newRow >= 0) & (newRow < self.rowSize) & (newCol >= 0) & (newCol < self.colSize)
+        self.agentRow = np.where(moving & inside, newRow, row)
+        self.agentCol = np.where(moving & inside, newCol, col)
+        self.bump = np.where(moving, ~inside, self.bump)
+        self.scream = self.scream & ~moving
+        # grab
+        grabbing = active & (actions == GRAB)
+        self.hasGold |= grabbing & (row == self.goldRow) & (col == self.goldCol)
+        # shoot, the arrow flies in the facing direction until it hits the wumpus or a wall
+        shooting = active & (actions == SHOOT)
+        hit = (((facing == UP) & (col == self.wumpusCol) & (row > self.wumpusRow)) |
+               ((facing == RIGHT_FACING) & (row == self.wumpusRow) & (col < self.wumpusCol)) |
+               ((facing == LEFT_FACING) & (row == self.wumpusRow) & (col > self.wumpusCol)) |
+               ((facing == DOWN) & (col == self.wumpusCol) & (row < self.wumpusRow)))
+        self.wumpusAlive &= ~(shooting & (self.arrow != 0) & hit)
+        self.arrow = np.where(shooting, 0, self.arrow).astype(np.int8)
+        screaming = shooting & ~self.wumpusAlive
+        # turns, 'left' and 'right' are the only actions not listed above, as in agent_move
+        turning = active & ((actions == LEFT) | (actions == RIGHT))
+        self.agentFacing = np.where(active & (actions == LEFT), (facing + 3) % 4,
+                                    np.where(active & (actions == RIGHT), (facing + 1) % 4, facing)).astype(np.int8)
+        self.bump = self.bump & ~turning & ~screaming
+        self.scream = (self.scream & ~turning) | screaming
+
+    # dead worlds lose 1000, climbing out at the start with the gold wins 1000
+    def update_score(self):
+        eaten, fell, climbed = self.terminal_states()
+        dying = (eaten | fell) & ~self.done
+        self.score -= np.where(dying, 1000, 0)
+        self.score += np.where(climbed & self.hasGold & ~self.done, 1000, 0)
+
+    # (eaten, fell, climbed) arrays for the current positions
+    def terminal_states(self):
+        room = self.agentRow * self.colSize + self.agentCol
+        eaten = (self.agentRow == self.wumpusRow) & (self.agentCol == self.wumpusCol) & self.wumpusAlive
+        fell = ~eaten & self.pits[np.arange(self.batchSize), room]
+        climbed = ((self.agentRow == self.start[0]) & (self.agentCol == self.start[1]) & (self.lastAction == CLIMB))
+        return eaten, fell, climbed
+
+    # array of worlds whose episode has ended
+    def terminal_test(self):
+        eaten, fell, climbed = self.terminal_states()
+        return eaten | fell | climbed | self.endEpisode
+
+    # agent_move, update_score and the terminal test of one step, returns the array of worlds done so far
+    def step(self, actions):
+        self.agent_move(actions)
+        self.update_score()
+        eaten, fell, climbed = self.terminal_states()
+        ending = ~self.done & (eaten | fell | climbed | self.endEpisode)
+        outcome = np.where(eaten, EATEN, np.where(fell, PIT, np.where(climbed, CLIMBED,
+                           np.where(self.hasGold, GOLD, EXITED))))
+        self.outcome = np.where(ending, outcome, self.outcome).astype(np.int8)
+        self.done |= ending
+        return self.done
@@ -0,0 +1,260 @@
+
+'''Wumpus World Benchmarks'''
+#
+# Runs the agents on a fixed set of seeded worlds and measures, for each agent, engine and world size:
+#   latency     - time of each WWAgent.action call, p50/p95/p99 in milliseconds
+#   leaves      - models the engine looked at for each action call, see wwagent.engineStats
+#   throughput  - episodes of wwsim.Simulation per second, best of -repeat runs
+#   memory      - peak memory allocated while running the episodes, measured with tracemalloc
+# the results can be saved as JSON and compared with a saved baseline, slower or larger numbers
+# than the baseline by more than -tolerance are reported as regressions
+#
+# run with:
+# python3 wwbench.py -json baseline.json
+# and after a change:
+# python3 wwbench.py -baseline baseline.json
+
+
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import statistics
+import tracemalloc
+from functools import partial
+
+import wwlog
+import wwsim
+import wwagent
+import wwbatch
+
+# agent:engine:size of the cases run by default, the truthtable engine takes minutes per episode so is left out
+CASES = ['v1:bitmask:4x4', 'v1:propagate:4x4', 'v1:frontier:4x4', 'v1:bitmask:8x8', 'v1:frontier:8x8', 'v3:bitmask:4x4']
+
+# metrics compared with the baseline, (path in the case results, true if larger is better)
+METRICS = [
+    (('latencyMs', 'p50'), False),
+    (('latencyMs', 'p95'), False),
+    (('latencyMs', 'p99'), False),
+    (('leaves', 'mean'), False),
+    (('episodesPerSecond',), True),
+    (('peakMemoryKB',), False),
+]
+
+# (agent, engine, (rows, cols)) of a case name such as 'v1:bitmask:4x4'
+def parseCase(name):
+    parts = name.split(':')
+    if len(parts) != 3 or parts[0] not in wwbatch.AGENTS or parts[1] not in wwagent.ENGINES:
+        raise ValueError('Case \'' + name + '\' should be agent:engine:size, e.g. v1:bitmask:4x4, with agent one of ' +
+                         ', '.join(sorted(wwbatch.AGENTS)) + ' and engine one of ' + ', '.join(wwagent.ENGINES))
+    return (parts[0], parts[1], wwsim.parseSize(parts[2], 'wwbench.py'))
+
+# puts the state shared between agents back as it is in a new process, so every case starts the same way
+def resetShared():
+    wwagent.ptableCache.clear()
+    wwagent.engineStats.clear()
+
+# agent factory whose agents record the time taken and the models looked at by each call of action
+def timedFactory(agentFactory, latencies, leaves):
+    def makeAgent(cols, rows):
+        agent = agentFactory(cols=cols, rows=rows)
+        action = agent.action
+        def timedAction():
+            before = wwagent.engineStats.leaves
+            start = time.perf_counter()
+            result = action()
+            latencies.append(time.perf_counter() - start)
+            leaves.append(wwagent.engineStats.leaves - before)
+            return result
+        agent.action = timedAction
+        return agent
+    return makeAgent
+
+# runs the episodes, returns the list of EpisodeResult, with the outcome 'error' for an agent that raised
+def runEpisodes(agentFactory, episodes, seed, maxSteps, size):
+    results = []
+    for episodeId in range(episodes):
+        try:
+            results.append(wwsim.run_episode(agentFactory, seed, maxSteps, episodeId, size[0], size[1]))
+        except Exception:
+            results.append(wwsim.errorResult(seed, episodeId))
+    return results
+
+# min, mean, percentiles and max of a list of numbers, scaled by 'scale'
+def distribution(values, scale=1):
+    values = sorted([value * scale for value in values])
+    if not values:
+        return None
+    return {
+        'mean': statistics.mean(values),
+        'p50': wwbatch.percentile(values, 0.5),
+        'p95': wwbatch.percentile(values, 0.95),
+        'p99': wwbatch.percentile(values, 0.99),
+        'max': values[-1],
+    }
+
+# measures one case, each measurement runs the same episodes from the same starting state
+def benchCase(name, episodes, seed, maxSteps, repeat, useCache):
+    agent, engine, size = parseCase(name)
+    cache = wwagent.ptableCache if useCache else None
+    agentFactory = partial(wwbatch.AGENTS[agent], engine, cache)
+    # latency and leaves of each decision
+    latencies = []
+    leaves = []
+    resetShared()
+    results = runEpisodes(timedFactory(agentFactory, latencies, leaves), episodes, seed, maxSteps, size)
+    cacheHits = wwagent.ptableCache.hits
+    cacheLookups = wwagent.ptableCache.hits + wwagent.ptableCache.misses
+    # throughput, without the timing of each decision
+    wallTimes = []
+    for i in range(repeat):
+        resetShared()
+        start = time.perf_counter()
+        runEpisodes(agentFactory, episodes, seed, maxSteps, size)
+        wallTimes.append(time.perf_counter() - start)
+    # peak memory, tracemalloc slows the episodes down so it gets a run of its own
+    resetShared()
+    tracemalloc.start()
+    runEpisodes(agentFactory, episodes, seed, maxSteps, size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    finished = [result for result in results if result.outcome != 'error']
+    errors = [result for result in results if result.outcome == 'error']
+    outcomes = {}
+    for result in results:
+        outcomes[result.outcome] = outcomes.get(result.outcome, 0) + 1
+    steps = sum([result.steps for result in finished])
+    wallTime = min(wallTimes)
+    return {
+        'agent': agent,
+        'engine': engine,
+        'size': str(size[1]) + 'x' + str(size[0]),
+        'episodes': episodes,
+        'outcomes': outcomes,
+        'scoreTotal': sum([result.score for result in finished]), # changes only if the agent's decisions change
+        'decisions': len(latencies),
+        'latencyMs': distribution(latencies, 1000),
+        'leaves': dict(distribution(leaves), total=sum(leaves)) if leaves else None,
+        'cacheHitRate': cacheHits / cacheLookups if cacheLookups else None,
+        'wallTime': wallTime,
+        'episodesPerSecond': episodes / wallTime if wallTime > 0 else None,
+        'stepsPerSecond': steps / wallTime if wallTime > 0 else None,
+        'peakMemoryKB': peak / 1024,
+        'errors': len(errors),
+        'firstError': {'episodeId': errors[0].episodeId, 'traceback': errors[0].error} if errors else None,
+    }
+
+# runs every case and returns the results, ready to be saved as JSON
+def runBench(cases=CASES, episodes=200, seed=0, maxSteps=1000, repeat=3, useCache=True):
+    level = wwlog.setLevel(wwlog.QUIET)
+    try:
+        results = {}
+        for name in cases:
+            results[name] = benchCase(name, episodes, seed, maxSteps, repeat, useCache)
+    finally:
+        wwlog.setLevel(level)
+    return {
+        'settings': {'episodes': episodes, 'seed': seed, 'maxSteps': maxSteps, 'repeat': repeat, 'cache': useCache},
+        'environment': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                        'machine': platform.machine(), 'system': platform.system()},
+        # kilobytes on Linux, the whole process including every case
+        'maxRSS': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'cases': results,
+    }
+
+def metricValue(case, path):
+    value = case
+    for key in path:
+        if value is None:
+            return None
+        value = value.get(key)
+    return value
+
+# compares the cases found in both results, returns a list of
+# (case, metric, baseline value, current value, relative change, true if a regression beyond 'tolerance')
+def compareResults(current, baseline, tolerance=0.1):
+    rows = []
+    for name, case in current['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+        for path, largerIsBetter in METRICS:
+            new = metricValue(case, path)
+            old = metricValue(base, path)
+            if new is None or old is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            if largerIsBetter:
+                regression = change < -tolerance
+            else:
+                regression = change > tolerance
+            rows.append((name, '.'.join(path), old, new, change, regression))
+    return rows
+
+def printResults(results):
+    print('------------------------------------------------------------------')
+    for name, case in results['cases'].items():
+        latency = case['latencyMs']
+        leaves = case['leaves']
+        print(name, '   Episodes: ', case['episodes'], '   Outcomes: ', case['outcomes'])
+        if latency is not None:
+            print('   Action latency (ms):  p50', round(latency['p50'], 4), ' p95', round(latency['p95'], 4),
+                  ' p99', round(latency['p99'], 4), ' max', round(latency['max'], 4))
+            print('   Leaves per decision:  mean', round(leaves['mean'], 1), ' p50', leaves['p50'], ' p95', leaves['p95'],
+                  ' max', leaves['max'], '   Decisions: ', case['decisions'])
+        print('   Episodes/s: ', round(case['episodesPerSecond'], 1), '   Steps/s: ', round(case['stepsPerSecond'], 1),
+              '   Peak memory (KB): ', round(case['peakMemoryKB'], 1))
+        wwbatch.printFirstError(case['errors'], case['firstError'])
+    print('------------------------------------------------------------------')
+
+def printComparison(rows, tolerance):
+    print('Compared with the baseline (tolerance ' + str(round(tolerance * 100, 1)) + '%):')
+    for name, metric, old, new, change, regression in rows:
+        print('  ', name.ljust(18), metric.ljust(18), str(round(old, 4)).rjust(12), '->', str(round(new, 4)).rjust(12),
+              ('%+.1f%%' % (change * 100)).rjust(9), '  REGRESSION' if regression else '')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Wumpus World agents on a fixed set of seeded worlds.')
+    parser.add_argument('-cases', nargs='+', default=CASES, help='agent:engine:size of each case (default: ' + ' '.join(CASES) + ')')
+    parser.add_argument('-episodes', type=int, default=200, help='episodes of each case (default 200)')
+    parser.add_argument('-seed', type=int, default=0, help='seed of the worlds (default 0)')
+    parser.add_argument('-maxsteps', type=int, default=1000, help='steps before an episode times out (default 1000)')
+    parser.add_argument('-repeat', type=int, default=3, help='throughput runs of each case, the fastest is kept (default 3)')
+    parser.add_argument('-nocache', action='store_true', help='run the agents without the shared ptable cache')
+    parser.add_argument('-json', default=None, help='write the results to this file')
+    parser.add_argument('-baseline', default=None, help='compare the results with this file, written by -json')
+    parser.add_argument('-tolerance', type=float, default=0.1, help='relative change reported as a regression (default 0.1)')
+    args = parser.parse_args(argv)
+    if args.episodes < 1 or args.repeat < 1:
+        parser.error('-episodes and -repeat must be at least 1')
+    try:
+        for name in args.cases:
+            parseCase(name)
+    except Exception as e:
+        parser.error(str(e))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['settings'] != {'episodes': args.episodes, 'seed': args.seed, 'maxSteps': args.maxsteps,
+                                    'repeat': args.repeat, 'cache': not args.nocache}:
+            print('Warning: the baseline was run with other settings,', baseline['settings'])
+    results = runBench(args.cases, args.episodes, args.seed, args.maxsteps, args.repeat, not args.nocache)
+    printResults(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        for name, case in results['cases'].items():
+            base = baseline['cases'].get(name)
+            if base is not None and base['scoreTotal'] != case['scoreTotal']:
+                print('Note:', name, 'scores differ from the baseline, the agent no longer makes the same decisions')
+        rows = compareResults(results, baseline, args.tolerance)
+        printComparison(rows, args.tolerance)
+        if any([row[5] for row in rows]):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
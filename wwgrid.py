@@ -0,0 +1,59 @@
+
+'''Wumpus World Grid Topology'''
+#
+# Neighbours of every room of a grid, worked out once per grid size and shared by the agents,
+# their rule tables and the simulation, so none of them builds lists of rooms or checks bounds as they run.
+#
+# the simulation names rooms (r, c) and numbers them r*cols + c, the agents name them (x, y) = (c, r)
+
+
+# facings of the agent and the (row, column) step of a move forward
+STEPS = (('up', -1, 0), ('right', 0, 1), ('down', 1, 0), ('left', 0, -1))
+
+# Topology of a grid of 'rows' x 'cols' rooms
+#   neighbours[i]      - numbers of the rooms next to room i, above, below, to the left and to the right of it
+#   neighbourMasks[i]  - the same rooms as bits of an integer, bit j for room j, as in Simulation.pitMask
+#   ahead[facing][i]   - (r, c) of the room in front of room i for each facing, None at a wall
+#   surrounding[(x, y)] - the agents' (x, y) rooms next to (x, y), in the order of wwagent.getSurroundingRooms
+class GridTopology:
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        rooms = [(r, c) for r in range(rows) for c in range(cols)]
+        neighbours = []
+        for r, c in rooms:
+            near = []
+            for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                if 0 <= r + dr < rows and 0 <= c + dc < cols:
+                    near.append((r + dr) * cols + c + dc)
+            neighbours.append(tuple(near))
+        self.neighbours = tuple(neighbours)
+        masks = []
+        for near in neighbours:
+            mask = 0
+            for room in near:
+                mask |= 1 << room
+            masks.append(mask)
+        self.neighbourMasks = tuple(masks)
+        self.ahead = {}
+        for facing, dr, dc in STEPS:
+            self.ahead[facing] = tuple([(r + dr, c + dc) if 0 <= r + dr < rows and 0 <= c + dc < cols else None
+                                        for r, c in rooms])
+        self.surrounding = {}
+        for r, c in rooms:
+            near = []
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                if 0 <= c + dx < cols and 0 <= r + dy < rows:
+                    near.append((c + dx, r + dy))
+            self.surrounding[(c, r)] = tuple(near)
+
+# one GridTopology per grid size (rows, cols)
+grids = {}
+
+def getGrid(rows, cols):
+    grid = grids.get((rows, cols))
+    if grid is None:
+        grid = GridTopology(rows, cols)
+        grids[(rows, cols)] = grid
+    return grid
@@ -0,0 +1,116 @@
+
+'''Wumpus World Logging'''
+#
+# Log level switch for the messages of the agents and the simulation, and an optional stream of
+# structured events for tools that read the runs back.
+#
+# levels:
+#   quiet - nothing is printed
+#   info  - one line for each notable thing in an episode (new agent, gold, outcome)
+#   debug - every decision of the agents and every step of the non-GUI simulation (the default)
+#
+# the level can be set with setLevel, the -log option of wwsim.py or the WWLOG environment variable
+# events are only built when a sink has been added with addSink, so they cost nothing otherwise
+
+
+import os
+import json
+from collections import deque
+
+QUIET = 0
+INFO = 1
+DEBUG = 2
+LEVELS = {'quiet': QUIET, 'info': INFO, 'debug': DEBUG}
+
+# current level, messages above it are dropped before they are formatted
+level = LEVELS.get(os.environ.get('WWLOG', 'debug').lower(), DEBUG)
+
+# sets the level from its name or number, returns the previous level
+def setLevel(newLevel):
+    global level
+    previous = level
+    if isinstance(newLevel, str):
+        if newLevel.lower() not in LEVELS:
+            raise ValueError('Unknown log level \'' + newLevel + '\', use one of ' + ', '.join(LEVELS))
+        newLevel = LEVELS[newLevel.lower()]
+    level = newLevel
+    return previous
+
+# true if messages at 'messageLevel' are printed, for callers that build an expensive message
+def enabled(messageLevel):
+    return level >= messageLevel
+
+# prints the arguments as print does, at the info level
+def info(*args):
+    if level >= INFO:
+        print(*args)
+
+# prints the arguments as print does, at the debug level
+def debug(*args):
+    if level >= DEBUG:
+        print(*args)
+
+# Structured events
+# each event is a dict with its 'event' name and its fields, e.g.
+#   {"event": "step", "episodeId": 3, "step": 12, "action": "move", "position": [2, 1], ...}
+
+# in-memory ring buffer keeping the last 'maxlen' events
+class RingBuffer:
+
+    def __init__(self, maxlen=10000):
+        self.buffer = deque(maxlen=maxlen)
+
+    def add(self, record):
+        self.buffer.append(record)
+
+    def events(self, name=None):
+        if name is None:
+            return list(self.buffer)
+        return [record for record in self.buffer if record['event'] == name]
+
+    def clear(self):
+        self.buffer.clear()
+
+    def close(self):
+        pass
+
+# writes each event as one line of JSON to a file name or an open file
+class JsonLinesSink:
+
+    def __init__(self, file):
+        if isinstance(file, str):
+            self.file = open(file, 'w')
+            self.ownsFile = True
+        else:
+            self.file = file
+            self.ownsFile = False
+
+    def add(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def close(self):
+        if self.ownsFile:
+            self.file.close()
+        else:
+            self.file.flush()
+
+# sinks receiving every event, no sinks turns events off
+sinks = []
+
+def addSink(sink):
+    sinks.append(sink)
+    return sink
+
+def removeSink(sink):
+    if sink in sinks:
+        sinks.remove(sink)
+        sink.close()
+
+# sends an event to every sink, callers on the hot path check 'if sinks:' first to skip building the fields
+def event(name, **fields):
+    if not sinks:
+        return
+    record = {'event': name}
+    record.update(fields)
+    for sink in sinks:
+        sink.add(record)
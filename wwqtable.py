@@ -0,0 +1,137 @@
+
+'''Wumpus World Q-Table'''
+#
+# Q-values of the Q-learning agent (wwagent_v3.py), one row per state and one column per action,
+# held in a NumPy array owned by the agent or by whatever trains it.
+# entries that have not been learned yet are NaN, and are seeded with an initial value the first time they are updated
+# a learned value of 0.0 is a value like any other, it is not seeded again
+# Needs NumPy.
+#
+# file layout, little endian, written by QTable.save and mapped by QTable.load:
+#   header  'WWQT', version byte, 3 pad bytes, states, actions, episodes learned from, epsilon (NaN if not set)
+#   values  states x actions float64, row by row, starting at byte HEADER.size so the array is aligned
+
+
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'WWQT'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xIIQd')
+
+class QTable:
+
+    # a table of 'states' rows and 'actions' columns, every entry unknown, or holding the (states, actions) array 'values'
+    def __init__(self, states, actions=4, dtype=np.float64, values=None):
+        if values is None:
+            values = np.full((states, actions), np.nan, dtype=dtype)
+        self.values = values
+        self.episodes = 0 # episodes learned from, saved with the table
+        self.epsilon = None # exploration rate reached by the training, saved with the table, None if not set
+        self.path = None # file the values are mapped from, set by load
+        self.mode = None
+
+    # table with one state per room of a grid of cols x rows rooms
+    @classmethod
+    def for_grid(cls, cols, rows, actions=4):
+        return cls(cols * rows, actions)
+
+    def __repr__(self):
+        return 'QTable(' + str(self.values.shape[0]) + ' states, ' + str(self.values.shape[1]) + ' actions, ' + \
+               str(int(np.count_nonzero(~np.isnan(self.values)))) + ' known)'
+
+    # value of an entry, None if it has not been learned yet
+    def get(self, state, action):
+        value = self.values[state, action]
+        if np.isnan(value):
+            return None
+        return float(value)
+
+    def clear(self):
+        self.values.fill(np.nan)
+
+    # true for a table mapped read-only, which can be shared by many processes but not learned in
+    @property
+    def readonly(self):
+        return not self.values.flags.writeable
+
+    # writes the table and its training metadata to 'path'
+    # the file is replaced in one step, so processes that have mapped the old file keep reading it unchanged
+    def save(self, path):
+        states, actions = self.values.shape
+        epsilon = np.nan if self.epsilon is None else self.epsilon
+        temp = path + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, states, actions, self.episodes, epsilon))
+            f.write(np.ascontiguousarray(self.values, dtype='<f8').tobytes())
+        os.replace(temp, path)
+
+    # table mapped from a file written by save, with np.memmap so the values are only read as they are used
+    # mode 'r' shares the file read-only, 'c' gives a private copy-on-write table to go on training in,
+    # 'r+' changes the file itself
+    @classmethod
+    def load(cls, path, mode='r'):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(path + ' is not a Wumpus World Q-table')
+        magic, version, states, actions, episodes, epsilon = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(path + ' is not a Wumpus World Q-table')
+        if version != VERSION:
+            raise ValueError('Unsupported Q-table version ' + str(version))
+        values = np.memmap(path, dtype='<f8', mode=mode, offset=HEADER.size, shape=(states, actions))
+        table = cls(states, actions, values=values)
+        table.episodes = episodes
+        table.epsilon = None if np.isnan(epsilon) else epsilon
+        table.path = path
+        table.mode = mode
+        return table
+
+    # a table mapped read-only is pickled as its file, so worker processes map it too instead of copying it
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if self.path is not None and self.mode == 'r':
+            del state['values']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'values' not in state:
+            self.values = QTable.load(self.path, self.mode).values
+
+    # action with the highest known value in 'state', among 'actions' (a list of columns) or all of them
+    # ties go to the first of the actions, returns None if none of them has a value yet
+    def best(self, state, actions=None):
+        row = self.values[state]
+        if actions is not None:
+            row = row[actions]
+        if np.isnan(row).all():
+            return None
+        column = int(np.nanargmax(row))
+        if actions is not None:
+            return actions[column]
+        return column
+
+    # best action of each of an array of states, -1 for the states without a known value
+    def best_actions(self, states):
+        rows = self.values[states]
+        known = ~np.isnan(rows)
+        best = np.argmax(np.where(known, rows, -np.inf), axis=1)
+        return np.where(known.any(axis=1), best, -1)
+
+    # moves an entry by 'rate' of the way to 'target', or sets it to 'initial' if it has no value yet
+    def update(self, state, action, target, initial, rate=1.0):
+        value = self.values[state, action]
+        if np.isnan(value):
+            self.values[state, action] = np.nan if initial is None else initial
+        else:
+            self.values[state, action] = value + rate * (target - value)
+
+    # update for arrays of states, actions, targets and initial values, e.g. a batch of steps from many worlds
+    # a (state, action) pair repeated in one batch is only updated once, by its last step
+    def update_batch(self, states, actions, targets, initials, rate=1.0):
+        values = self.values[states, actions]
+        self.values[states, actions] = np.where(np.isnan(values), initials, values + rate * (np.asarray(targets) - values))
@@ -0,0 +1,88 @@
+
+'''Wumpus World Experience Replay'''
+#
+# Fixed-capacity ring buffer of the Q-learning agent's transitions (state, action, reward, next state, done),
+# kept in preallocated NumPy arrays so every step can be learned from again in vectorized minibatches.
+# Sampling is uniform, or prioritized by the size of each transition's last error, with importance weights.
+# Needs NumPy.
+
+
+import numpy as np
+
+class ReplayBuffer:
+
+    # 'capacity' transitions, the oldest are overwritten once it is full
+    # each call of learn updates the Q-table from 'batchSize' transitions, moving each entry by 'rate' of the way to its target
+    # the target of a transition is its reward plus 'future', as in the v3 agent's own update, done or not,
+    # or, if discount is given, its reward plus, unless it is done, the discounted best known value of the next state
+    # alpha is how strongly prioritized sampling follows the priorities, beta how much the importance weights correct for it
+    def __init__(self, capacity, batchSize=32, rate=0.1, discount=None, future=1.0, prioritized=False, seed=None,
+                 alpha=0.6, beta=0.4):
+        self.capacity = capacity
+        self.batchSize = batchSize
+        self.rate = rate
+        self.discount = discount
+        self.future = future
+        self.prioritized = prioritized
+        self.states = np.zeros(capacity, dtype=np.int32)
+        self.actions = np.zeros(capacity, dtype=np.int32)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.nextStates = np.zeros(capacity, dtype=np.int32)
+        self.done = np.zeros(capacity, dtype=bool)
+        self.initials = np.zeros(capacity, dtype=np.float64) # value of an entry learned for the first time
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self.alpha = alpha
+        self.beta = beta
+        self.rng = np.random.default_rng(seed)
+        self.size = 0 # transitions held
+        self.next = 0 # slot of the next transition
+        self.maxPriority = 1.0
+
+    def __len__(self):
+        return self.size
+
+    # adds a transition, at the highest priority so far so it is sampled at least once soon
+    # initial is the value an unknown Q-table entry starts at, None leaves it unknown
+    def add(self, state, action, reward, nextState, done, initial=None):
+        i = self.next
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.nextStates[i] = nextState
+        self.done[i] = done
+        self.initials[i] = np.nan if initial is None else initial
+        self.priorities[i] = self.maxPriority
+        self.next = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    # indices of 'batchSize' transitions and their importance weights (all 1 for uniform sampling)
+    def sample(self, batchSize, prioritized=False):
+        if not prioritized:
+            return (self.rng.integers(0, self.size, batchSize), np.ones(batchSize))
+        scaled = self.priorities[:self.size] ** self.alpha
+        probabilities = scaled / scaled.sum()
+        indices = self.rng.choice(self.size, batchSize, p=probabilities)
+        weights = (self.size * probabilities[indices]) ** -self.beta
+        return (indices, weights / weights.max())
+
+    # one vectorized update of 'qtable' from a minibatch of the buffer, returns the number of transitions learned from
+    def learn(self, qtable):
+        if self.size == 0:
+            return 0
+        indices, weights = self.sample(self.batchSize, self.prioritized)
+        states = self.states[indices]
+        actions = self.actions[indices]
+        if self.discount is None:
+            targets = self.rewards[indices] + self.future
+        else:
+            nextValues = qtable.values[self.nextStates[indices]]
+            known = ~np.isnan(nextValues)
+            later = self.discount * np.where(known.any(axis=1), np.where(known, nextValues, -np.inf).max(axis=1), 0.0)
+            targets = self.rewards[indices] + np.where(self.done[indices], 0.0, later)
+        values = qtable.values[states, actions]
+        qtable.update_batch(states, actions, targets, self.initials[indices], self.rate * weights)
+        if self.prioritized:
+            errors = np.abs(targets - np.where(np.isnan(values), self.initials[indices], values))
+            self.priorities[indices] = np.nan_to_num(errors, nan=0.0) + 1e-6
+            self.maxPriority = max(self.maxPriority, float(self.priorities[indices].max()))
+        return len(indices)
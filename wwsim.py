@@ -6,11 +6,19 @@
 
 
 import sys
+import time
+import random
+import traceback
+from collections import namedtuple
 
+import wwlog
+import wwgrid
 from wwagent import *
 
-from tkinter import *
-from random import randint
+try:
+    from tkinter import *
+except ImportError: # the simulation runs without Tk, only the Display needs it
+    pass
 
 # in your inner loop use it thus (just an example, I would probably use a named tuple)
 #
@@ -22,103 +30,153 @@ COLUMNS = 4
 ROWS = 4
 FONTTYPE = "Purisa"
 
+# Percept bits, each room keeps its percepts as one small integer
+STENCH = 1
+BREEZE = 2
+GLITTER = 4
+BUMP = 8
+SCREAM = 16
+# the percept tuple handed to the agent for every combination of percept bits
+PERCEPT_TUPLES = tuple([('stench' if bits & STENCH else None, 'breeze' if bits & BREEZE else None,
+                         'glitter' if bits & GLITTER else None, 'bump' if bits & BUMP else None,
+                         'scream' if bits & SCREAM else None) for bits in range(32)])
+
+# Random number generator of one episode
+# seeded from (seed, episodeId, stream) so each stream of each episode is reproducible on its own,
+# the 'world' stream places the wumpus, gold and pits and the 'agent' stream is for the agent's choices
+# a seed of None gives a different, unseeded generator every time
+def episodeRandom(seed, episodeId, stream):
+    if seed is None:
+        return random.Random()
+    return random.Random(str(seed) + ':' + str(episodeId) + ':' + stream)
+
 # SET UP CLASS AND METHODS HERE
 # Simulation class for running the underlying factors of the simulation
+# rooms are numbered r*colSize + c, pits are the bits of one integer and percepts one byte per room
 class Simulation:
 
-    def __init__(self, rowSize, colSize, score):
+    __slots__ = ('rowSize', 'colSize', 'seed', 'episodeId', 'agentFactory', 'agent', 'score', 'lastMove', 'lastPos',
+                 'agentPos', 'agentFacing', 'arrow', 'wumpusAlive', 'pitMask', 'senses', 'wumpusLoc', 'goldLocation',
+                 'hasGold', 'endEpisode', 'onDeath', 'start', 'grid')
+
+    def __init__(self, rowSize, colSize, score, agentFactory=WWAgent, seed=None, episodeId=0):
         self.rowSize = rowSize
         self.colSize = colSize
-        self.agent = WWAgent()
+        self.grid = wwgrid.getGrid(rowSize, colSize) # neighbours of every room, shared with the agents
+        self.seed = seed # with episodeId, fully determines the world made by generate_simulation
+        self.episodeId = episodeId
+        self.agentFactory = agentFactory # called with the keywords cols and rows to create the agent for each episode
+        self.start = (rowSize - 1, 0) # the agent starts and climbs out in the bottom left room
+        # None leaves the simulation without an agent until run_episode sets the factory, e.g. to reuse it for many episodes
+        self.agent = self.new_agent() if agentFactory is not None else None
         self.score = score
         self.lastMove = 'None'
-        self.lastPos = (3, 0)
-        self.agentPos = (3, 0)
+        self.lastPos = self.start
+        self.agentPos = self.start
         self.agentFacing = 'right'
         self.arrow = 1
         self.wumpusAlive = True
-        self.pits = {}
-        self.percepts = {}
-        for r in range(self.rowSize):
-            for c in range(self.colSize):
-                self.percepts['room'+str(r)+str(c)] = (None, None, None, None, None)
+        self.pitMask = 0
+        self.senses = bytearray(self.rowSize * self.colSize)
         self.wumpusLoc = (None, None)
         self.goldLocation = (None, None)
         self.hasGold = False
         self.endEpisode = False # self termination
+        self.onDeath = None # called by terminal_test when the agent dies, if set
+
+    # percept tuple of room (r, c), as handed to the agent
+    def get_percepts(self, r, c):
+        return PERCEPT_TUPLES[self.senses[r * self.colSize + c]]
+
+    # percept bits of room (r, c), STENCH | BREEZE | GLITTER | BUMP | SCREAM
+    def percept_bits(self, r, c):
+        return self.senses[r * self.colSize + c]
+
+    def has_pit(self, r, c):
+        return (self.pitMask >> (r * self.colSize + c)) & 1 == 1
+
+    def pit_locations(self):
+        pl = []
+        for r in range(self.rowSize):
+            for c in range(self.colSize):
+                if self.has_pit(r, c):
+                    pl.append((r, c))
+        return pl
+
+    # adds the percept bit to the rooms around (r, c)
+    def set_adjacent(self, r, c, bit):
+        for room in self.grid.neighbours[r * self.colSize + c]:
+            self.senses[room] |= bit
+
+    # sets the breeze of every room next to a pit in pitMask
+    def set_breezes(self):
+        masks = self.grid.neighbourMasks
+        for room in range(self.rowSize * self.colSize):
+            if self.pitMask & masks[room]:
+                self.senses[room] |= BREEZE
 
     def set_percepts(self, r, c, item):
         if (item == 'gold'):
-            p = self.percepts['room'+str(r)+str(c)]
-            self.percepts['room'+str(r)+str(c)] = (p[0], p[1], 'glitter', p[3], p[4])
+            self.senses[r * self.colSize + c] |= GLITTER
         if (item == 'wumpus'):
-            p = self.percepts['room'+str(r)+str(c)]
-            #self.percepts['room'+str(r)+str(c)] = ('stench', p[1], p[2], p[3], p[4])
-            if ((r - 1) >= 0):
-                p = self.percepts['room'+str(r-1)+str(c)]
-                self.percepts['room'+str(r-1)+str(c)] = ('stench', p[1], p[2], p[3], p[4])
-            if ((r + 1) < 4):
-                p = self.percepts['room'+str(r+1)+str(c)]
-                self.percepts['room'+str(r+1)+str(c)] = ('stench', p[1], p[2], p[3], p[4])
-            if ((c - 1) >= 0):
-                p = self.percepts['room'+str(r)+str(c-1)]
-                self.percepts['room'+str(r)+str(c-1)] = ('stench', p[1], p[2], p[3], p[4])
-            if ((c + 1) < 4):
-                p = self.percepts['room'+str(r)+str(c+1)]
-                self.percepts['room'+str(r)+str(c+1)] = ('stench', p[1], p[2], p[3], p[4])
+            self.set_adjacent(r, c, STENCH)
         if (item == 'pit'):
-            if ((r - 1) >= 0):
-                p = self.percepts['room'+str(r-1)+str(c)]
-                self.percepts['room'+str(r-1)+str(c)] = (p[0], 'breeze', p[2], p[3], p[4])
-            if ((r + 1) < 4):
-                p = self.percepts['room'+str(r+1)+str(c)]
-                self.percepts['room'+str(r+1)+str(c)] = (p[0], 'breeze', p[2], p[3], p[4])
-            if ((c - 1) >= 0):
-                p = self.percepts['room'+str(r)+str(c-1)]
-                self.percepts['room'+str(r)+str(c-1)] = (p[0], 'breeze', p[2], p[3], p[4])
-            if ((c + 1) < 4):
-                p = self.percepts['room'+str(r)+str(c+1)]
-                self.percepts['room'+str(r)+str(c+1)] = (p[0], 'breeze', p[2], p[3], p[4])
+            self.set_adjacent(r, c, BREEZE)
+
+    # creates the agent, giving it its own random stream if it has one
+    def new_agent(self):
+        agent = self.agentFactory(cols=self.colSize, rows=self.rowSize)
+        if hasattr(agent, 'rng'):
+            agent.rng = episodeRandom(self.seed, self.episodeId, 'agent')
+        return agent
 
     def generate_simulation(self):
+        rng = episodeRandom(self.seed, self.episodeId, 'world')
         # Set wumpus location
-        self.wumpusLoc = (randint(0, 3), randint(0, 3))
-        while (self.wumpusLoc == (3, 0)):
-            self.wumpusLoc = (randint(0, 3), randint(0, 3))
+        self.wumpusLoc = (rng.randint(0, self.rowSize - 1), rng.randint(0, self.colSize - 1))
+        while (self.wumpusLoc == self.start):
+            self.wumpusLoc = (rng.randint(0, self.rowSize - 1), rng.randint(0, self.colSize - 1))
         # Set wumpus percepts
         self.set_percepts(self.wumpusLoc[0], self.wumpusLoc[1], 'wumpus')
         # Set gold location
-        self.goldLocation = (randint(0, 3), randint(0, 3))
-        while (self.goldLocation == (3, 0)) or (self.goldLocation == self.wumpusLoc):
-            self.goldLocation = (randint(0, 3), randint(0, 3))
+        self.goldLocation = (rng.randint(0, self.rowSize - 1), rng.randint(0, self.colSize - 1))
+        while (self.goldLocation == self.start) or (self.goldLocation == self.wumpusLoc):
+            self.goldLocation = (rng.randint(0, self.rowSize - 1), rng.randint(0, self.colSize - 1))
         # Set gold percepts
         self.set_percepts(self.goldLocation[0], self.goldLocation[1], 'gold')
         # Generate pits
         for r in range(self.rowSize):
             for c in range(self.colSize):
-                if (randint(1, 5) == 3) and ((r != 3) or (c != 0)):
-                    self.pits['room'+str(r)+str(c)] = True
-                    # Set pit percepts
-                    self.set_percepts(r, c, 'pit')
+                if (rng.randint(1, 5) == 3) and ((r, c) != self.start):
+                    self.pitMask |= 1 << (r * self.colSize + c)
                 else:
-                    self.pits['room'+str(r)+str(c)] = False
+                    self.pitMask &= ~(1 << (r * self.colSize + c))
+        # Set pit percepts
+        self.set_breezes()
+
+    # sets a world made elsewhere, e.g. read back from a trace, instead of generate_simulation
+    def set_world(self, wumpusLoc, goldLocation, pitMask):
+        self.senses = bytearray(self.rowSize * self.colSize)
+        self.wumpusLoc = wumpusLoc
+        self.set_percepts(wumpusLoc[0], wumpusLoc[1], 'wumpus')
+        self.goldLocation = goldLocation
+        self.set_percepts(goldLocation[0], goldLocation[1], 'gold')
+        self.pitMask = pitMask
+        self.set_breezes()
 
     def reset_stats(self, newScore):
         self.agent = None
         self.score = newScore
         self.lastMove = 'None'
-        self.lastPos = (3, 0)
-        self.agentPos = (3, 0)
+        self.lastPos = self.start
+        self.agentPos = self.start
         self.agentFacing = 'right'
         self.arrow = 1
         self.hasGold = False
         self.wumpusAlive = True
-        self.percepts = {}
-        self.agent = WWAgent()
+        self.senses = bytearray(self.rowSize * self.colSize)
+        self.agent = self.new_agent()
         self.endEpisode=False
-        for r in range(self.rowSize):
-            for c in range(self.colSize):
-                self.percepts['room'+str(r)+str(c)] = (None, None, None, None, None)
 
     def agent_move(self, action):
         
@@ -134,32 +192,12 @@ class Simulation:
         c = self.agentPos[1]
         if (action == 'move'):
             self.lastPos = self.agentPos
-            bump = False
-            if (self.agentFacing == 'right'):
-                if ((c + 1) < 4):
-                    self.agentPos = (self.agentPos[0], self.agentPos[1] + 1)
-                else:
-                    bump = True
-            elif (self.agentFacing == 'up'):
-                if ((r - 1) >= 0):
-                    self.agentPos = (self.agentPos[0] - 1, self.agentPos[1])
-                else:
-                    bump = True
-            elif (self.agentFacing == 'left'):
-                if ((c - 1) >= 0):
-                    self.agentPos = (self.agentPos[0], self.agentPos[1] - 1)
-                else:
-                    bump = True
+            ahead = self.grid.ahead[self.agentFacing][r * self.colSize + c]
+            if (ahead is None):
+                self.senses[r * self.colSize + c] |= BUMP
             else:
-                if ((r + 1) < 4):
-                    self.agentPos = (self.agentPos[0] + 1, self.agentPos[1])
-                else:
-                    bump = True
-            if (bump):
-                p = self.percepts['room'+str(r)+str(c)]
-                self.percepts['room'+str(r)+str(c)] = (p[0], p[1], p[2], 'bump', p[4])
-            p = self.percepts['room'+str(r)+str(c)]
-            self.percepts['room'+str(r)+str(c)] = (p[0], p[1], p[2], p[3], None)
+                self.agentPos = ahead
+            self.senses[r * self.colSize + c] &= ~SCREAM
             self.lastMove = 'Move Forward'
         elif (action == 'grab'):
             if (self.agentPos == self.goldLocation):
@@ -183,8 +221,7 @@ class Simulation:
                         self.wumpusAlive = False
                 self.arrow = 0
             if (self.wumpusAlive == False):
-                p = self.percepts['room'+str(r)+str(c)]
-                self.percepts['room'+str(r)+str(c)] = (p[0], p[1], p[2], None, 'scream')
+                self.senses[r * self.colSize + c] = (self.senses[r * self.colSize + c] & ~BUMP) | SCREAM
             self.lastMove = 'Shoot'
         else:
             if (action == 'left'):
@@ -207,8 +244,7 @@ class Simulation:
                 else:
                     self.agentFacing = 'right'
                 self.lastMove = 'Rotate Right'
-            p = self.percepts['room'+str(r)+str(c)]
-            self.percepts['room'+str(r)+str(c)] = (p[0], p[1], p[2], None, None)
+            self.senses[r * self.colSize + c] &= ~(BUMP | SCREAM)
         #print 'S-position: ', self.agentPos
 
     def terminal_test(self):
@@ -216,35 +252,61 @@ class Simulation:
         r = self.agentPos[0]
         c = self.agentPos[1]
         if (self.agentPos == self.wumpusLoc) and (self.wumpusAlive == True):
+            if self.onDeath:
+                self.onDeath()
             return True
-        elif (self.pits['room'+str(r)+str(c)]):
+        elif (self.has_pit(r, c)):
+            if self.onDeath:
+                self.onDeath()
             return True
-        elif (self.agentPos == (3, 0)) and self.lastMove.lower() == 'climb':
+        elif (self.agentPos == self.start) and self.lastMove.lower() == 'climb':
             return True
         else:
             return False
 
+    # how the episode ended, or None if it is still running
+    def outcome(self):
+        if (self.agentPos == self.wumpusLoc) and (self.wumpusAlive == True):
+            return 'eaten'
+        elif (self.has_pit(self.agentPos[0], self.agentPos[1])):
+            return 'pit'
+        elif (self.agentPos == self.start) and self.lastMove.lower() == 'climb':
+            return 'climbed'
+        elif (self.endEpisode):
+            if (self.hasGold):
+                return 'gold'
+            return 'exit'
+        return None
+
     def update_score(self):
         r = self.agentPos[0]
         c = self.agentPos[1]
         if (self.agentPos == self.wumpusLoc) and (self.wumpusAlive == True):
             self.score = self.score - 1000
-        elif (self.pits['room'+str(r)+str(c)]):
+        elif (self.has_pit(r, c)):
             self.score = self.score - 1000
-        elif (self.agentPos == (3, 0)) and self.lastMove.lower() == 'climb':
+        elif (self.agentPos == self.start) and self.lastMove.lower() == 'climb':
             if (self.hasGold):
                 self.score = self.score + 1000
 
     def move(self):
         p = self.agentPos
-        self.agent.update(self.percepts['room'+str(p[0])+str(p[1])])
+        facing = self.agentFacing
+        percepts = self.get_percepts(p[0], p[1])
+        self.agent.update(percepts)
         action = self.agent.action()
         #print "Sim action: ", action
         self.agent_move(action)
+        if wwlog.sinks:
+            # where the agent was, what it sensed and did there, and its score after the action
+            wwlog.event('step', seed=self.seed, episodeId=self.episodeId, position=list(p), facing=facing,
+                        percepts=[percept for percept in percepts if percept], action=action, score=self.score)
+        return action
 
 
 
 # Display class for running and modifying the GUI
+# rooms are 100 pixels wide on worlds up to 4 rooms across, larger worlds shrink them to fit the same area
 class Display:
 
     score = None
@@ -254,41 +316,52 @@ class Display:
     percepts = None
     agentDirection = None
 
+    # image file shrunk to the room size
+    def load_image(self, file):
+        image = PhotoImage(file=file)
+        if self.zoom > 1:
+            image = image.subsample(self.zoom)
+        return image
+
     def set_room(self, r, c, sim):
         # Returns agent image
         if (sim.agentPos[0] == r) and (sim.agentPos[1] == c):
             if (sim.agentFacing.lower() == 'right'):
-                return PhotoImage(file="Images/agent-right.gif")
+                return self.load_image("Images/agent-right.gif")
             elif (sim.agentFacing.lower() == 'up'):
-                return PhotoImage(file="Images/agent-up.gif")
+                return self.load_image("Images/agent-up.gif")
             elif (sim.agentFacing.lower() == 'left'):
-                return PhotoImage(file="Images/agent-left.gif")
+                return self.load_image("Images/agent-left.gif")
             else:
-                return PhotoImage(file="Images/agent-down.gif")
+                return self.load_image("Images/agent-down.gif")
         # Returns start image
-        elif (r == 3) and (c == 0):
-            return PhotoImage(file="Images/start.gif")
+        elif (r, c) == sim.start:
+            return self.load_image("Images/start.gif")
         # Returns wumpus
         elif (r == sim.wumpusLoc[0]) and (c == sim.wumpusLoc[1]):
-            if (sim.pits['room'+str(r)+str(c)]):
-                return PhotoImage(file="Images/pit-wumpus.gif")
+            if (sim.has_pit(r, c)):
+                return self.load_image("Images/pit-wumpus.gif")
             else:
-                return PhotoImage(file="Images/live-wumpus.gif")
+                return self.load_image("Images/live-wumpus.gif")
         # Returns gold and pit or gold
         elif (r == sim.goldLocation[0]) and (c == sim.goldLocation[1]):
-            if (sim.pits['room'+str(r)+str(c)]):
-                return PhotoImage(file="Images/gold-pit.gif")
+            if (sim.has_pit(r, c)):
+                return self.load_image("Images/gold-pit.gif")
             else:
-                return PhotoImage(file="Images/gold.gif")
+                return self.load_image("Images/gold.gif")
         # Returns a pit
-        elif (sim.pits['room'+str(r)+str(c)]):
-            return PhotoImage(file="Images/pit.gif")
+        elif (sim.has_pit(r, c)):
+            return self.load_image("Images/pit.gif")
         # Returns an empty room
         else:
-            return PhotoImage(file="Images/emptyroom.gif")
+            return self.load_image("Images/emptyroom.gif")
 
     def __init__(self, master, simulation):
-        frame = Frame(master, width = 700, height = 500)
+        self.zoom = max(1, -(-max(simulation.rowSize, simulation.colSize) // 4)) # images are shrunk by this factor
+        self.roomSize = 100 // self.zoom + 2 # pixels from one room to the next
+        self.panelX = simulation.colSize * self.roomSize + 12 # left edge of the labels and buttons
+        self.panelY = simulation.rowSize * self.roomSize + 12 # top of the percepts below the grid
+        frame = Frame(master, width = self.panelX + 280, height = max(500, self.panelY + 80))
         frame.pack()
         self.grid = {}
         self.score = StringVar()
@@ -300,7 +373,7 @@ class Display:
         self.pastMove.set('None')
         self.arrowStatus.set('Available')
         self.agentDirection.set('Right')
-        self.percepts.set(str(simulation.percepts['room30']))
+        self.percepts.set(str(simulation.get_percepts(simulation.start[0], simulation.start[1])))
         theScoreDis = Label(master, font=(FONTTYPE, 16), text="Performance:")
         lastMoveDis = Label(master, font=(FONTTYPE, 16), text="Last Move:")
         performanceDis = Label(master, font=(FONTTYPE, 14), textvariable=self.score)
@@ -312,24 +385,24 @@ class Display:
         agentDirectionTitle = Label(master, font=(FONTTYPE, 16), text = "Agent Facing:")
         agentDirectionDis = Label(master, font=(FONTTYPE, 14), textvariable=self.agentDirection)
         self.goldStatus = Label(master, font=(FONTTYPE, 16), fg='Gold', text = "Agent has gold!")
-        performanceDis.place(x = 420, y = 25)
-        theScoreDis.place(x = 420, y = 0)
-        arrowTitle.place(x = 420, y = 75)
-        self.arrowStatusDis.place(x = 420, y = 100)
-        lastMoveDis.place(x = 420, y = 150)
-        pastMoveDis.place(x = 420, y = 175)
-        perceptsTitle.place(x = 5, y = 420)
-        perceptsDis.place(x = 5, y = 445)
-        agentDirectionTitle.place(x = 420, y = 285)
-        agentDirectionDis.place(x = 420, y = 312)
+        performanceDis.place(x = self.panelX, y = 25)
+        theScoreDis.place(x = self.panelX, y = 0)
+        arrowTitle.place(x = self.panelX, y = 75)
+        self.arrowStatusDis.place(x = self.panelX, y = 100)
+        lastMoveDis.place(x = self.panelX, y = 150)
+        pastMoveDis.place(x = self.panelX, y = 175)
+        perceptsTitle.place(x = 5, y = self.panelY)
+        perceptsDis.place(x = 5, y = self.panelY + 25)
+        agentDirectionTitle.place(x = self.panelX, y = 285)
+        agentDirectionDis.place(x = self.panelX, y = 312)
 
         #creating the initial grid
-        for r in range(ROWS):
-            for c in range(COLUMNS):
+        for r in range(simulation.rowSize):
+            for c in range(simulation.colSize):
                 tkimage = self.set_room(r, c, simulation)
-                self.grid['room'+str(r)+str(c)] = Label(master, image = tkimage)
-                self.grid['room'+str(r)+str(c)].image = tkimage
-                self.grid['room'+str(r)+str(c)].place(x = c*100 + c*2, y = r*100 + r*2)
+                self.grid[(r, c)] = Label(master, image = tkimage)
+                self.grid[(r, c)].image = tkimage
+                self.grid[(r, c)].place(x = c*self.roomSize, y = r*self.roomSize)
 
         #initializations
     def update_move(self, sim):
@@ -343,242 +416,361 @@ class Display:
             r = sim.lastPos[0]
             c = sim.lastPos[1]
             tempImg = self.set_room(r, c, sim)
-            self.grid['room'+str(r)+str(c)].config(image = tempImg)
-            self.grid['room'+str(r)+str(c)].image = tempImg
+            self.grid[(r, c)].config(image = tempImg)
+            self.grid[(r, c)].image = tempImg
         r = sim.agentPos[0]
         c = sim.agentPos[1]
         tempImg = self.set_room(r, c, sim) 
-        self.grid['room'+str(r)+str(c)].config(image = tempImg)
-        self.grid['room'+str(r)+str(c)].image = tempImg
-        currentPercepts = sim.percepts['room'+str(sim.agentPos[0])+str(sim.agentPos[1])]
+        self.grid[(r, c)].config(image = tempImg)
+        self.grid[(r, c)].image = tempImg
+        currentPercepts = sim.get_percepts(sim.agentPos[0], sim.agentPos[1])
         self.percepts.set(str(currentPercepts))
         if (sim.hasGold):
-            self.goldStatus.place(x = 500, y = 225)
+            self.goldStatus.place(x = self.panelX + 80, y = 225)
         if (sim.arrow == 0):
             self.arrowStatus.set('Used')
         if (sim.wumpusAlive == False):
             loc = sim.wumpusLoc
             if (sim.agentPos != sim.wumpusLoc):
-                temp = PhotoImage(file="Images/dead-wumpus.gif")
+                temp = self.load_image("Images/dead-wumpus.gif")
             else:
                 temp = self.set_room(loc[0], loc[1], sim)
-            self.grid['room'+str(loc[0])+str(loc[1])].config(image = temp)
-            self.grid['room'+str(loc[0])+str(loc[1])].image = temp
+            self.grid[loc].config(image = temp)
+            self.grid[loc].image = temp
 
     def reset_display(self, sim):
-        for r in range(ROWS):
-            for c in range(COLUMNS):
+        for r in range(sim.rowSize):
+            for c in range(sim.colSize):
                 tkimage = self.set_room(r, c, sim)
-                self.grid['room'+str(r)+str(c)].config(image = tkimage)
-                self.grid['room'+str(r)+str(c)].image = tkimage
+                self.grid[(r, c)].config(image = tkimage)
+                self.grid[(r, c)].image = tkimage
         self.score.set(str(sim.score))
         self.pastMove.set(sim.lastMove)
         self.agentDirection.set(sim.agentFacing.title())
         self.arrowStatus.set('Available')
         self.arrowStatusDis.config(fg='Green')
-        currentPercepts = sim.percepts['room'+str(sim.agentPos[0])+str(sim.agentPos[1])]
+        currentPercepts = sim.get_percepts(sim.agentPos[0], sim.agentPos[1])
         self.percepts.set(str(currentPercepts))
         self.goldStatus.place_forget()
         
 
 
-# Interpret command-line call with arguments
-
-arglist = sys.argv
-if (len(sys.argv) == 2):
-    if (arglist[1].lower() == '-gui'):
-        print('Running GUI...')
-        # RUN SIMULATION WITH GUI DISPLAY
-        root = Tk()
-        root.wm_title("Wumpus World Simulation")
-        sim = Simulation(ROWS, COLUMNS, 0)
+# Result of a single episode run by run_episode
+# outcome is one of 'gold', 'exit', 'climbed', 'eaten', 'pit' or 'timeout', or 'error' for an episode that raised
+# error is the traceback of an 'error' episode, None otherwise
+EpisodeResult = namedtuple('EpisodeResult', ['score', 'outcome', 'steps', 'wallTime', 'seed', 'episodeId', 'error'],
+                           defaults=(None,))
+
+# result of an episode whose agent or simulation raised, to be called in the except block so it keeps the traceback
+def errorResult(seed, episodeId):
+    return EpisodeResult(None, 'error', None, None, seed, episodeId, traceback.format_exc())
+
+# Runs one episode without a display and returns an EpisodeResult
+# (seed, episodeId) determines the world and the agent's random choices, max_steps stops agents that never end the episode
+# rows and cols set the size of the world
+# trace, if given, records the episode: trace.begin(sim) once the world is made, trace.step(perceptBits, action, score)
+# after every step and trace.end(result) at the end, see wwtrace.EpisodeRecorder
+# sim, a Simulation of the same size left by an earlier episode, is reset and reused instead of making a new one
+def run_episode(agent_factory, seed=None, max_steps=1000, episodeId=0, rows=ROWS, cols=COLUMNS, trace=None, sim=None):
+    start = time.perf_counter()
+    if sim is None:
+        sim = Simulation(rows, cols, 0, agent_factory, seed, episodeId)
+    else:
+        sim.agentFactory = agent_factory
+        sim.seed = seed
+        sim.episodeId = episodeId
+        sim.reset_stats(0)
+    sim.generate_simulation()
+    if trace is not None:
+        trace.begin(sim)
+    steps = 0
+    while (sim.terminal_test() is not True) and (sim.endEpisode is not True) and steps < max_steps:
+        if trace is not None:
+            bits = sim.percept_bits(sim.agentPos[0], sim.agentPos[1])
+        action = sim.move()
+        sim.update_score()
+        if trace is not None:
+            trace.step(bits, action, sim.score)
+        steps = steps + 1
+    outcome = sim.outcome()
+    if outcome is None:
+        outcome = 'timeout'
+    result = EpisodeResult(sim.score, outcome, steps, time.perf_counter() - start, seed, episodeId)
+    if trace is not None:
+        trace.end(result)
+    if wwlog.sinks:
+        wwlog.event('episode', **result._asdict())
+    return result
+
+# Runs the simulation with the Tkinter display
+# resetOnDeath restarts the agent in the same world when it dies instead of ending the episode
+def runGui(agentFactory=WWAgent, resetOnDeath=False, rows=ROWS, cols=COLUMNS):
+    wwlog.info('Running GUI...')
+    # RUN SIMULATION WITH GUI DISPLAY
+    root = Tk()
+    root.wm_title("Wumpus World Simulation")
+    sim = Simulation(rows, cols, 0, agentFactory)
+    sim.generate_simulation()
+    app = Display(root, sim)
+    panelX = app.panelX # the buttons and messages are placed relative to the side panel
+
+    # Starts the agent again in the same world
+    def resetAgent():
+        sim.reset_stats(0)
+        app.reset_display(sim)
+        eaten.place_forget()
+        fell.place_forget()
+        climbOut.place_forget()
+        makeMove.place(x = panelX, y = 225)
+    if resetOnDeath:
+        sim.onDeath = resetAgent
+
+    # Updates the sim with each move
+    def resetGame():
+        sim.episodeId = sim.episodeId + 1
+        sim.reset_stats(0)
         sim.generate_simulation()
-        app = Display(root, sim)
-
-        # Updates the sim with each move
-        def resetGame():
-            sim.reset_stats(0)
-            sim.generate_simulation()
-            app.reset_display(sim)
-            eaten.place_forget()
-            fell.place_forget()
-            climbOut.place_forget()
-            makeMove.place(x = 420, y = 225)
-        def updateSim():
-            if (sim.endEpisode):
-                resetGame()
-                return
-            sim.move()
-            sim.update_score()
-            if (sim.terminal_test() and sim.lastMove.lower() == 'climb'):
-                climbOut.place(x = 420, y = 400)
-                makeMove.place_forget()
-            elif (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-
-        # Methods for the buttons to operate the agent manually
-        def movePlayer():
-            sim.agent_move('move')
-            sim.update_score()
-            if (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-        def moveLeft():
-            sim.agent_move('left')
-            sim.update_score()
-            if (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-        def moveRight():
-            sim.agent_move('right')
-            sim.update_score()
-            if (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-        def grab():
-            sim.agent_move('grab')
-            sim.update_score()
-            if (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-        def climb():
-            sim.agent_move('climb')
-            sim.update_score()
-            if (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-        def shoot():
-            sim.agent_move('shoot')
-            sim.update_score()
-            if (sim.terminal_test()):
-                if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
-                    eaten.place(x = 420, y = 400)
-                else:
-                    fell.place(x = 420, y = 400)
-                makeMove.place_forget()
-            app.update_move(sim)
-        # The move button
-        makeMove = Button(root, text = "Move", font = (FONTTYPE, 14), command = updateSim)
-        makeMove.place(x = 420, y = 225)
+        app.reset_display(sim)
+        eaten.place_forget()
+        fell.place_forget()
+        climbOut.place_forget()
+        makeMove.place(x = panelX, y = 225)
+    def updateSim():
+        if (sim.endEpisode):
+            resetGame()
+            return
+        sim.move()
+        sim.update_score()
+        if (sim.terminal_test() and sim.lastMove.lower() == 'climb'):
+            climbOut.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        elif (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+
+    # Methods for the buttons to operate the agent manually
+    def movePlayer():
+        sim.agent_move('move')
+        sim.update_score()
+        if (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+    def moveLeft():
+        sim.agent_move('left')
+        sim.update_score()
+        if (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+    def moveRight():
+        sim.agent_move('right')
+        sim.update_score()
+        if (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+    def grab():
+        sim.agent_move('grab')
+        sim.update_score()
+        if (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+    def climb():
+        sim.agent_move('climb')
+        sim.update_score()
+        if (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+    def shoot():
+        sim.agent_move('shoot')
+        sim.update_score()
+        if (sim.terminal_test()):
+            if (sim.agentPos == sim.wumpusLoc) and (sim.wumpusAlive is True):
+                eaten.place(x = panelX, y = 400)
+            else:
+                fell.place(x = panelX, y = 400)
+            makeMove.place_forget()
+        app.update_move(sim)
+    # The move button
+    makeMove = Button(root, text = "Move", font = (FONTTYPE, 14), command = updateSim)
+    makeMove.place(x = panelX, y = 225)
 
 #       BELOW ARE BUTTONS FOR MANUALLY CONTROLLING THE AGENT
 #       They can be used for testing the simulation runs properly
 #       Uncomment the following lines to use them
 #
-        go = Button(root, text = "Go", font = (FONTTYPE, 14), command = movePlayer)
-        go.place(x = 470, y = 350)
-        left = Button(root, text = "Left", font = (FONTTYPE, 14), command = moveLeft)
-        left.place(x = 420, y = 350)
-        right = Button(root, text = "Right", font = (FONTTYPE, 14), command = moveRight)
-        right.place(x = 515, y = 350)
-        toGrab = Button(root, text = "Grab", font = (FONTTYPE, 14), command = grab)
-        toGrab.place(x = 500, y = 435)
-        toClimb = Button(root, text = "Climb", font = (FONTTYPE, 14), command = climb)
-        toClimb.place(x = 570, y = 435)
-        toShoot = Button(root, text = "Shoot", font = (FONTTYPE, 14), command = shoot)
-        toShoot.place(x = 420, y = 390)
-
-        reset = Button(root, text = "Reset", font = (FONTTYPE, 14), command = resetGame)
-        eaten = Label(root, text = "WUMPUS ATE AGENT", fg = 'Red', font = (FONTTYPE, 16))
-        climbOut = Label(root, text = "Player climbed out", fg = 'Green', font = (FONTTYPE, 18))
-        fell = Label(root, text = "AGENT FELL IN PIT", fg = 'Red', font = (FONTTYPE, 16))
-        
-
-
-        reset.place(x = 420, y = 435)
+    go = Button(root, text = "Go", font = (FONTTYPE, 14), command = movePlayer)
+    go.place(x = panelX + 50, y = 350)
+    left = Button(root, text = "Left", font = (FONTTYPE, 14), command = moveLeft)
+    left.place(x = panelX, y = 350)
+    right = Button(root, text = "Right", font = (FONTTYPE, 14), command = moveRight)
+    right.place(x = panelX + 95, y = 350)
+    toGrab = Button(root, text = "Grab", font = (FONTTYPE, 14), command = grab)
+    toGrab.place(x = panelX + 80, y = 435)
+    toClimb = Button(root, text = "Climb", font = (FONTTYPE, 14), command = climb)
+    toClimb.place(x = panelX + 150, y = 435)
+    toShoot = Button(root, text = "Shoot", font = (FONTTYPE, 14), command = shoot)
+    toShoot.place(x = panelX, y = 390)
+
+    reset = Button(root, text = "Reset", font = (FONTTYPE, 14), command = resetGame)
+    eaten = Label(root, text = "WUMPUS ATE AGENT", fg = 'Red', font = (FONTTYPE, 16))
+    climbOut = Label(root, text = "Player climbed out", fg = 'Green', font = (FONTTYPE, 18))
+    fell = Label(root, text = "AGENT FELL IN PIT", fg = 'Red', font = (FONTTYPE, 16))
+    
+
+
+    reset.place(x = panelX, y = 435)
+
+    # Main simulation loop
+    root.mainloop()
+    #
+
+# Runs the simulation while writing to standard output
+def runNonGui(agentFactory=WWAgent, rows=ROWS, cols=COLUMNS):
+    wwlog.info('Running Non-GUI...')
+    wwlog.info('\n')
+    # RUN SIMULATION WHILE WRITING TO standard output
+    sim = Simulation(rows, cols, 0, agentFactory)
+    sim.generate_simulation()
+    wl = sim.wumpusLoc
+    gl = sim.goldLocation
+    pl = sim.pit_locations()
+    moveCount = 0
+
+    # Print the steps
+    wwlog.info('START OF SIMULATION')
+    while (sim.terminal_test() is not True) and (sim.endEpisode is not True ):
+        if wwlog.enabled(wwlog.DEBUG):
+            wwlog.debug('------------------------------------------------------------------')
+            wwlog.debug('Move: ', moveCount)
+            wwlog.debug('Last Action: ', sim.lastMove)
+            wwlog.debug('\n')
+            wwlog.debug('Wumpus World Item Locations:')
+            wwlog.debug('Wumpus Location: ', wl, '   Gold Location: ', gl)
+            wwlog.debug('Pit Locations: ', str(pl))
+            wwlog.debug('\n')
+            wwlog.debug('Agent Info:')
+            wwlog.debug('Position: ', sim.agentPos, '   Facing: ', sim.agentFacing)
+            wwlog.debug('Has Gold: ', str(sim.hasGold), '   Arrow: ', sim.arrow)
+            wwlog.debug('\n')
+            wwlog.debug('Simlulation Current States:')
+            wwlog.debug('Wumpus Alive: ', str(sim.wumpusAlive), '   Performance: ', sim.score)
+            wwlog.debug('Current Percepts: ', str(sim.get_percepts(sim.agentPos[0], sim.agentPos[1])))
+        # Prompt agent to move
+        sim.move()
+        sim.update_score()
+        moveCount = moveCount + 1
+    # Print final result
+    wwlog.info('------------------------------------------------------------------')
+    wwlog.info('Last Action: ', sim.lastMove)
+    wwlog.info('GAME OVER')
+    wwlog.info('\n')
+    if (sim.endEpisode):
+        wwlog.info("Agent acquired the gold.")
+    elif sim.lastMove.lower() == 'climb':
+        wwlog.info('Agent has climbed out of cave.')
+    elif sim.agentPos == sim.wumpusLoc:
+        wwlog.info('Agent was eaten by the wumpus and died!')
+    else:
+        wwlog.info('Agent fell into pit and died!')
+    wwlog.info('\n')
+    wwlog.info('Final Performance: ', sim.score)
+
+def printHelp(program='wwsim.py'):
+    print('------------------------------------------------------------------')
+    print('This python program runs a simulation of Wumpus World.')
+    print('\n')
+    print('To run the GUI represented version, run the following command:')
+    print('>\tpython ' + program + ' -gui')
+    print('\n')
+    print('To run the Non-GUI version, run the following command:')
+    print('>\tpython ' + program + ' -nongui')
+    print('\n')
+    print('Either can be given the size of the world in rooms across by rooms down, e.g.:')
+    print('>\tpython ' + program + ' -gui -size 8x8')
+    print('\n')
+    print('Add -log quiet, -log info or -log debug (the default) to set how much is printed,')
+    print('and -events FILE to write every step as a line of JSON to FILE, e.g.:')
+    print('>\tpython ' + program + ' -nongui -log info -events steps.jsonl')
+    print('------------------------------------------------------------------')
+
+# (rows, cols) of a world size given as COLUMNSxROWS, e.g. '16x8'
+def parseSize(text, program='wwsim.py'):
+    try:
+        cols, rows = [int(n) for n in text.lower().split('x')]
+    except ValueError:
+        raise Exception('Invalid world size \'' + text + '\'. Run \'python ' + program + ' -help\' for help.')
+    if cols < 2 or rows < 2:
+        raise Exception('The world must be at least 2x2 rooms.')
+    return (rows, cols)
 
-        # Main simulation loop
-        root.mainloop()
-        #
-    elif (arglist[1].lower() == '-nongui'):
-        print('Running Non-GUI...')
-        print('\n')
-        # RUN SIMULATION WHILE WRITING TO standard output
-        sim = Simulation(ROWS, COLUMNS, 0)
-        sim.generate_simulation()
-        wl = sim.wumpusLoc
-        gl = sim.goldLocation
-        pl = []
-        for i in range(4):
-            for j in range(4):
-                if sim.pits['room'+str(i)+str(j)] is True:
-                    pl.append((i, j))
-        moveCount = 0
-
-        # Print the steps
-        print('START OF SIMULATION')
-        while (sim.terminal_test() is not True) and (sim.endEpisode is not True ):
-            print('------------------------------------------------------------------')
-            print ('Move: ', moveCount)
-            print ('Last Action: ', sim.lastMove)
-            print('\n')
-            print('Wumpus World Item Locations:')
-            print ('Wumpus Location: ', wl, '   Gold Location: ', gl)
-            print ('Pit Locations: ', str(pl))
-            print('\n')
-            print('Agent Info:')
-            print ('Position: ', sim.agentPos, '   Facing: ', sim.agentFacing)
-            print ('Has Gold: ', str(sim.hasGold), '   Arrow: ', sim.arrow)
-            print('\n')
-            print('Simlulation Current States:')
-            print ('Wumpus Alive: ', str(sim.wumpusAlive), '   Performance: ', sim.score)
-            print ('Current Percepts: ', str(sim.percepts['room'+str(sim.agentPos[0])+str(sim.agentPos[1])]))
-            # Prompt agent to move
-            sim.move()
-            sim.update_score()
-            moveCount = moveCount + 1
-        # Print final result
-        print('------------------------------------------------------------------')
-        print ('Last Action: ', sim.lastMove)
-        print('GAME OVER')
-        print('\n')
-        if (sim.endEpisode):
-            print("Agent acquired the gold.")
-        elif sim.lastMove.lower() == 'climb':
-            print('Agent has climbed out of cave.')
-        elif sim.agentPos == sim.wumpusLoc:
-            print('Agent was eaten by the wumpus and died!')
+# Interpret command-line call with arguments
+# options given after the mode, a dict of each option name, lowercased, and its value
+# extra names the options of the calling program that main does not know itself, e.g. ('-qtable',) for wwsim_v3.py
+def parseOptions(argv, program='wwsim.py', extra=()):
+    options = argv[2:]
+    if (len(options) % 2 != 0):
+        raise Exception('Invalid command-line call. Run \'python ' + program + ' -help\' for help.');
+    parsed = {}
+    for i in range(0, len(options), 2):
+        name = options[i].lower()
+        if name not in ('-size', '-log', '-events') + tuple(extra):
+            raise Exception('Invalid command-line argument. Run \'python ' + program + ' -help\' for help.');
+        parsed[name] = options[i + 1]
+    return parsed
+
+def main(argv=None, agentFactory=WWAgent, program='wwsim.py', resetOnDeath=False, extra=()):
+    if argv is None:
+        argv = sys.argv
+    rows, cols = ROWS, COLUMNS
+    sink = None
+    options = parseOptions(argv, program, extra)
+    if '-size' in options:
+        rows, cols = parseSize(options['-size'], program)
+    if '-log' in options:
+        if options['-log'].lower() not in wwlog.LEVELS:
+            raise Exception('Invalid log level \'' + options['-log'] + '\'. Run \'python ' + program + ' -help\' for help.');
+        wwlog.setLevel(options['-log'])
+    if '-events' in options:
+        sink = wwlog.addSink(wwlog.JsonLinesSink(options['-events']))
+    argv = argv[:2]
+    try:
+        if (len(argv) == 2):
+            if (argv[1].lower() == '-gui'):
+                runGui(agentFactory, resetOnDeath, rows, cols)
+            elif (argv[1].lower() == '-nongui'):
+                runNonGui(agentFactory, rows, cols)
+            elif (argv[1].lower() == '-help'):
+                printHelp(program)
+            else:
+                raise Exception('Invalid command-line argument. Run \'python ' + program + ' -help\' for help.');
         else:
-            print('Agent fell into pit and died!')
-        print('\n')
-        print ('Final Performance: ', sim.score)
-
-    elif (arglist[1].lower() == '-help'):
-        print('------------------------------------------------------------------')
-        print('This python program runs a simulation of Wumpus World.')
-        print('\n')
-        print('To run the GUI represented version, run the following command:')
-        print('>\tpython wwsim.py -gui')
-        print('\n')
-        print('To run the Non-GUI version, run the following command:')
-        print('>\tpython wwsim.py -nongui')
-        print('------------------------------------------------------------------')
-    else:
-        raise Exception('Invalid command-line argument. Run \'python wwsim.py -help\' for help.');
-else:
-    raise Exception('Invalid command-line call. Run \'python wwsim.py -help\' for help.');
+            raise Exception('Invalid command-line call. Run \'python ' + program + ' -help\' for help.');
+    finally:
+        if sink:
+            wwlog.removeSink(sink)
+
+if __name__ == '__main__':
+    main()
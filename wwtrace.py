@@ -0,0 +1,292 @@
+
+'''Wumpus World Episode Traces'''
+#
+# Compact binary record of episodes, the world once and then one small record per step,
+# and a replayer that drives a headless Simulation or the Tk Display from it.
+#
+# file layout, little endian:
+#   file header  'WWTR', version byte, 3 pad bytes
+#   then for each episode:
+#     header     rows, cols, flags, outcome code, seed, episodeId, wumpus room, gold room, final score, number of steps
+#     pits       one bit per room, room r*cols + c, in ceil(rows*cols/8) bytes
+#     steps      3 bytes each, action code << 5 | percept bits of the room the action was taken in,
+#                then the change of score as a signed 16 bit integer
+#
+# record with:
+# python3 wwbatch.py -episodes 1000 -trace episodes.wwt
+# replay with:
+# python3 wwtrace.py episodes.wwt -episode 3 -gui
+
+
+import struct
+import argparse
+from collections import namedtuple
+
+import wwlog
+import wwsim
+
+MAGIC = b'WWTR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sB3x')
+EPISODE_HEADER = struct.Struct('<BBBBqIHHiI')
+STEP = struct.Struct('<Bh')
+
+# Action codes, as in wwbatchsim.py, 'other' is any other action, which the simulation takes as a right turn
+ACTIONS = ('move', 'left', 'right', 'grab', 'shoot', 'climb', 'exit', 'other')
+ACTION_CODES = dict([(action, code) for code, action in enumerate(ACTIONS)])
+OTHER = 7
+
+# Outcome codes, as returned by wwsim.run_episode
+OUTCOMES = ('gold', 'exit', 'climbed', 'eaten', 'pit', 'timeout', 'error')
+
+# Episode header flags
+HAS_SEED = 1 # seed holds the episode's seed, otherwise it was None
+
+# One episode read back from a trace, stepData holds the raw step records (None if they were skipped)
+EpisodeTrace = namedtuple('EpisodeTrace', ['rows', 'cols', 'seed', 'episodeId', 'wumpusLoc', 'goldLocation', 'pitMask',
+                                           'outcome', 'score', 'steps', 'stepData'])
+
+# Records one episode of wwsim.run_episode, pass it as its trace argument
+# the encoded episode is in 'data' once the episode has ended
+class EpisodeRecorder:
+
+    def __init__(self):
+        self.data = None
+
+    def begin(self, sim):
+        if sim.seed is not None and not isinstance(sim.seed, int):
+            raise ValueError('Only integer seeds can be traced, not ' + repr(sim.seed))
+        self.rows = sim.rowSize
+        self.cols = sim.colSize
+        self.seed = sim.seed
+        self.episodeId = sim.episodeId
+        self.wumpusRoom = sim.wumpusLoc[0] * sim.colSize + sim.wumpusLoc[1]
+        self.goldRoom = sim.goldLocation[0] * sim.colSize + sim.goldLocation[1]
+        self.pitMask = sim.pitMask
+        self.score = sim.score
+        self.stepData = bytearray()
+        self.steps = 0
+        self.data = None
+
+    def step(self, perceptBits, action, score):
+        code = ACTION_CODES.get(action, OTHER)
+        self.stepData += STEP.pack(code << 5 | perceptBits, score - self.score)
+        self.score = score
+        self.steps += 1
+
+    def end(self, result):
+        flags = 0
+        if self.seed is not None:
+            flags |= HAS_SEED
+        header = EPISODE_HEADER.pack(self.rows, self.cols, flags, OUTCOMES.index(result.outcome), self.seed or 0,
+                                     self.episodeId, self.wumpusRoom, self.goldRoom, result.score, self.steps)
+        pits = self.pitMask.to_bytes(pitBytes(self.rows, self.cols), 'little')
+        self.data = header + pits + bytes(self.stepData)
+
+def pitBytes(rows, cols):
+    return (rows * cols + 7) // 8
+
+# Writes encoded episodes to a trace file, given its name or an open binary file
+class TraceWriter:
+
+    def __init__(self, file):
+        if isinstance(file, str):
+            self.file = open(file, 'wb')
+            self.ownsFile = True
+        else:
+            self.file = file
+            self.ownsFile = False
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.episodes = 0
+
+    def write_episode(self, data):
+        self.file.write(data)
+        self.episodes += 1
+
+    def close(self):
+        if self.ownsFile:
+            self.file.close()
+        else:
+            self.file.flush()
+
+# Reads the episodes of a trace file one at a time, so files of any length can be streamed
+# withSteps=False skips over the step records, for summaries that only need the headers
+def readTrace(file, withSteps=True):
+    if isinstance(file, str):
+        with open(file, 'rb') as f:
+            for trace in readTrace(f, withSteps):
+                yield trace
+        return
+    magic, version = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('Not a Wumpus World trace file')
+    if version != VERSION:
+        raise ValueError('Unsupported trace version ' + str(version))
+    while True:
+        header = file.read(EPISODE_HEADER.size)
+        if not header:
+            return
+        if len(header) < EPISODE_HEADER.size:
+            raise ValueError('Trace file ends in the middle of an episode')
+        fields = EPISODE_HEADER.unpack(header)
+        rows, cols, steps = fields[0], fields[1], fields[9]
+        pitMask = int.from_bytes(file.read(pitBytes(rows, cols)), 'little')
+        if withSteps:
+            stepData = file.read(steps * STEP.size)
+            if len(stepData) < steps * STEP.size:
+                raise ValueError('Trace file ends in the middle of an episode')
+        else:
+            stepData = None
+            file.seek(steps * STEP.size, 1)
+        yield makeTrace(fields, pitMask, stepData)
+
+# Decodes the episode starting at 'offset' of a bytes-like buffer, such as an mmap of a trace file
+# returns (EpisodeTrace, offset of the next episode)
+def decodeEpisode(buffer, offset=0):
+    fields = EPISODE_HEADER.unpack_from(buffer, offset)
+    rows, cols, steps = fields[0], fields[1], fields[9]
+    offset += EPISODE_HEADER.size
+    pitEnd = offset + pitBytes(rows, cols)
+    stepEnd = pitEnd + steps * STEP.size
+    if stepEnd > len(buffer):
+        raise ValueError('Trace ends in the middle of an episode')
+    pitMask = int.from_bytes(buffer[offset:pitEnd], 'little')
+    return (makeTrace(fields, pitMask, bytes(buffer[pitEnd:stepEnd])), stepEnd)
+
+# EpisodeTrace from the unpacked EPISODE_HEADER fields, the pits and the step records
+def makeTrace(fields, pitMask, stepData):
+    rows, cols, flags, outcome, seed, episodeId, wumpusRoom, goldRoom, score, steps = fields
+    if not flags & HAS_SEED:
+        seed = None
+    return EpisodeTrace(rows, cols, seed, episodeId, divmod(wumpusRoom, cols), divmod(goldRoom, cols), pitMask,
+                        OUTCOMES[outcome], score, steps, stepData)
+
+# (action, percept bits, score after the action) for each step of an episode
+def decodeSteps(trace):
+    score = 0
+    for code, delta in STEP.iter_unpack(trace.stepData):
+        score += delta
+        yield (ACTIONS[code >> 5], code & 31, score)
+
+# Agent taking the actions of a trace, in place of the agent that made it
+class ReplayAgent:
+
+    def __init__(self, actions):
+        self.actions = iter(actions)
+        self.percepts = (None, None, None, None, None)
+
+    def update(self, percept):
+        self.percepts = percept
+
+    def action(self):
+        return next(self.actions, 'exit')
+
+# Simulation of the world of a trace, with a ReplayAgent taking its actions
+def replaySimulation(trace):
+    actions = [action for action, bits, score in decodeSteps(trace)]
+    def agentFactory(cols, rows):
+        return ReplayAgent(actions)
+    sim = wwsim.Simulation(trace.rows, trace.cols, 0, agentFactory, trace.seed, trace.episodeId)
+    sim.set_world(trace.wumpusLoc, trace.goldLocation, trace.pitMask)
+    return sim
+
+# Steps 'sim' (by default a new replaySimulation) through a trace, yielding it after every step
+# raises ValueError if the percepts or the score differ from the ones recorded
+def replay(trace, sim=None):
+    if sim is None:
+        sim = replaySimulation(trace)
+    step = 0
+    for action, bits, score in decodeSteps(trace):
+        if sim.percept_bits(sim.agentPos[0], sim.agentPos[1]) != bits:
+            raise ValueError('Episode ' + str(trace.episodeId) + ' step ' + str(step) + ': percepts differ from the trace')
+        sim.move()
+        sim.update_score()
+        if sim.score != score:
+            raise ValueError('Episode ' + str(trace.episodeId) + ' step ' + str(step) + ': score differs from the trace')
+        step = step + 1
+        yield sim
+
+# Replays a whole episode headless and checks its outcome, returns the final simulation
+def verify(trace):
+    sim = replaySimulation(trace)
+    for sim in replay(trace, sim):
+        pass
+    outcome = sim.outcome()
+    if outcome is None:
+        outcome = 'timeout'
+    if outcome != trace.outcome or sim.score != trace.score:
+        raise ValueError('Episode ' + str(trace.episodeId) + ': outcome differs from the trace')
+    return sim
+
+# Replays an episode in the Tk Display, one step every 'delay' milliseconds
+def runReplayGui(trace, delay=500):
+    from tkinter import Tk
+    root = Tk()
+    root.wm_title("Wumpus World Replay - episode " + str(trace.episodeId))
+    sim = replaySimulation(trace)
+    app = wwsim.Display(root, sim)
+    steps = replay(trace, sim)
+    def nextStep():
+        try:
+            next(steps)
+        except StopIteration:
+            return
+        app.update_move(sim)
+        root.after(delay, nextStep)
+    root.after(delay, nextStep)
+    root.mainloop()
+
+# Prints the steps of an episode as the non-GUI simulation does
+def printReplay(trace):
+    sim = replaySimulation(trace)
+    wwlog.info('Episode: ', trace.episodeId, '   Seed: ', trace.seed, '   Size: ', str(trace.cols) + 'x' + str(trace.rows))
+    wwlog.info('Wumpus Location: ', sim.wumpusLoc, '   Gold Location: ', sim.goldLocation)
+    wwlog.info('Pit Locations: ', str(sim.pit_locations()))
+    move = 0
+    for sim in replay(trace, sim):
+        wwlog.info('Move: ', move, '   Action: ', sim.lastMove, '   Position: ', sim.agentPos, '   Facing: ', sim.agentFacing,
+                   '   Performance: ', sim.score)
+        move = move + 1
+    wwlog.info('Outcome: ', trace.outcome, '   Final Performance: ', trace.score)
+
+# Counts of a trace file, reading only the episode headers
+def summarizeTrace(file):
+    episodes = 0
+    steps = 0
+    outcomes = {}
+    for trace in readTrace(file, withSteps=False):
+        episodes += 1
+        steps += trace.steps
+        outcomes[trace.outcome] = outcomes.get(trace.outcome, 0) + 1
+    return {'episodes': episodes, 'steps': steps, 'outcomes': outcomes}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize, check or replay a Wumpus World trace file.')
+    parser.add_argument('file', help='trace file written by wwbatch.py -trace')
+    parser.add_argument('-episode', type=int, default=None, help='replay the episode with this ID')
+    parser.add_argument('-gui', action='store_true', help='replay the episode in the Tk display')
+    parser.add_argument('-delay', type=int, default=500, help='milliseconds between the steps of the GUI replay (default 500)')
+    parser.add_argument('-verify', action='store_true', help='replay every episode headless and check it against the trace')
+    args = parser.parse_args(argv)
+    if args.episode is not None:
+        for trace in readTrace(args.file):
+            if trace.episodeId == args.episode:
+                if args.gui:
+                    runReplayGui(trace, args.delay)
+                else:
+                    printReplay(trace)
+                return
+        parser.error('episode ' + str(args.episode) + ' is not in ' + args.file)
+    if args.verify:
+        episodes = 0
+        for trace in readTrace(args.file):
+            verify(trace)
+            episodes += 1
+        print('Replayed', episodes, 'episodes, all match the trace')
+        return
+    summary = summarizeTrace(args.file)
+    print('Episodes: ', summary['episodes'], '   Steps: ', summary['steps'])
+    print('Outcomes: ', summary['outcomes'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+
+'''Wumpus World Q-Learning Training'''
+#
+# Trains the Q-learning agent of wwagent_v3.py on many episodes spread over a pool of worker processes,
+# which all learn in one Q-table placed in multiprocessing.shared_memory.
+# The workers update the table without locks (Hogwild): two workers writing the same entry at the same time
+# only lose one of the two updates, which is rare as an update is one store into a large table and costs far less
+# than taking a lock on every step would.
+# With -workers 1 a Trainer runs the episodes one after another in this process, reusing one Simulation.
+# Either way epsilon can decay over the run, and the return, length and win of every episode are kept as a learning curve.
+#
+# run with:
+# python3 wwtrain.py -episodes 100000 -qtable qtable.wwq
+# and run it again with the same -qtable to go on training where it stopped
+# python3 wwtrain.py -episodes 100000 -workers 1 -epsilon 0.5 -epsilonend 0.05 -curve curve.npz -report 10000
+
+
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import wwlog
+import wwsim
+import wwagent
+import wwagent_v3
+import wwbatch
+from wwqtable import QTable
+from wwtrace import OUTCOMES
+from wwreplay import ReplayBuffer
+
+# kinds of EpsilonSchedule
+SCHEDULES = ('constant', 'linear', 'exponential')
+
+# exploration rate of each episode of a training run, picklable so the workers can follow it too
+#   constant     - 'start' for every episode
+#   linear       - from 'start' to 'end' in equal steps over the first 'episodes' episodes, then 'end'
+#   exponential  - from 'start' to 'end' by the same factor every episode over the first 'episodes' episodes, then 'end'
+class EpsilonSchedule:
+
+    def __init__(self, start, end=None, episodes=1, kind='constant'):
+        if kind not in SCHEDULES:
+            raise ValueError('Unknown epsilon schedule \'' + kind + '\', use one of ' + ', '.join(SCHEDULES))
+        if end is None:
+            end = start
+        if kind == 'exponential' and (start <= 0 or end <= 0):
+            raise ValueError('An exponential epsilon schedule needs a start and end above 0')
+        self.start = start
+        self.end = end
+        self.episodes = max(1, episodes)
+        self.kind = kind
+
+    def __repr__(self):
+        return 'EpsilonSchedule(' + str(self.start) + ', ' + str(self.end) + ', ' + str(self.episodes) + ', ' + self.kind + ')'
+
+    # epsilon of episode i of the run, counted from 0
+    def value(self, i):
+        if self.kind == 'constant':
+            return self.start
+        if i >= self.episodes:
+            return self.end
+        if self.kind == 'linear':
+            return self.start + (self.end - self.start) * i / self.episodes
+        return self.start * (self.end / self.start) ** (i / self.episodes)
+
+# Learning curves
+# one array per field with one entry per episode of a run, kept small enough to record runs of millions of episodes
+#   episode - episode ID     score   - return of the episode     steps - length of the episode
+#   win     - true if the agent climbed out with the gold        epsilon - exploration rate it was run with
+#   outcome - index of the outcome in wwtrace.OUTCOMES, 'error' for an agent that raised (score and steps 0)
+CURVE_FIELDS = (('episode', np.int64), ('score', np.int32), ('steps', np.int32), ('win', np.bool_),
+                ('epsilon', np.float32), ('outcome', np.int8))
+
+def newCurve(episodes):
+    return dict([(name, np.zeros(episodes, dtype=dtype)) for name, dtype in CURVE_FIELDS])
+
+# records the EpisodeResult of entry i of 'curve'
+def recordEpisode(curve, i, episodeId, result, epsilon):
+    curve['episode'][i] = episodeId
+    curve['epsilon'][i] = epsilon
+    curve['outcome'][i] = OUTCOMES.index(result.outcome)
+    curve['win'][i] = result.outcome == 'gold'
+    if result.outcome != 'error':
+        curve['score'][i] = result.score
+        curve['steps'][i] = result.steps
+
+# writes a curve as a compressed NumPy .npz file, to 'path' exactly as given
+def saveCurve(path, curve):
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **curve)
+
+def loadCurve(path):
+    with np.load(path) as data:
+        return dict([(name, data[name]) for name in data.files])
+
+# win rate and mean return of the first and last 'window' episodes of a curve, and of all of them
+# errors, the list filled by train, gives the traceback of the first episode that raised
+def summarizeCurve(curve, wallTime, window=None, errors=None):
+    episodes = len(curve['episode'])
+    if window is None:
+        window = max(1, episodes // 10)
+    window = min(window, episodes)
+    finished = curve['outcome'] != OUTCOMES.index('error')
+    def part(selection):
+        scores = curve['score'][selection][finished[selection]]
+        return {
+            'episodes': int(len(curve['win'][selection])),
+            'winRate': float(curve['win'][selection].mean()) if episodes else 0.0,
+            'meanScore': float(scores.mean()) if len(scores) else None,
+            'meanSteps': float(curve['steps'][selection][finished[selection]].mean()) if len(scores) else None,
+        }
+    return {
+        'episodes': episodes,
+        'errors': int(episodes - np.count_nonzero(finished)),
+        'all': part(slice(None)),
+        'first': part(slice(0, window)),
+        'last': part(slice(episodes - window, episodes)),
+        'epsilon': {'first': round(float(curve['epsilon'][0]), 6), 'last': round(float(curve['epsilon'][-1]), 6)} if episodes else None,
+        'firstError': {'episodeId': errors[0].episodeId, 'traceback': errors[0].error} if errors else None,
+        'wallTime': wallTime,
+        'episodesPerSecond': episodes / wallTime if wallTime > 0 else None,
+    }
+
+def printCurveSummary(summary):
+    print('------------------------------------------------------------------')
+    print('Episodes: ', summary['episodes'], '   Errors: ', summary['errors'], '   Epsilon: ', summary['epsilon'])
+    for name in ('first', 'last', 'all'):
+        part = summary[name]
+        print((name.capitalize() + ' ' + str(part['episodes']) + ':').ljust(16), 'Win Rate: ', round(part['winRate'], 4),
+              '   Mean score: ', None if part['meanScore'] is None else round(part['meanScore'], 2),
+              '   Mean steps: ', None if part['meanSteps'] is None else round(part['meanSteps'], 1))
+    print('Wall time (s): ', round(summary['wallTime'], 3), '   Episodes/s: ', round(summary['episodesPerSecond'], 1))
+    wwbatch.printFirstError(summary['errors'], summary['firstError'])
+    print('------------------------------------------------------------------')
+
+# ReplayBuffer of the settings (capacity, batchSize, rate, discount, prioritized), None for no settings
+def makeReplay(replay, seed=None):
+    if replay is None:
+        return None
+    capacity, batchSize, rate, discount, prioritized = replay
+    return ReplayBuffer(capacity, batchSize, rate, discount, prioritized=prioritized, seed=seed)
+
+# Trains the Q-learning agent in 'table' episode after episode in this process, without a display
+# one Simulation is reset and reused for every episode, and one replay buffer, if given, is kept across them
+# schedule, an EpsilonSchedule, sets the exploration rate of each episode, counted from firstEpisode,
+# by default the table's epsilon, or the agent's, for every episode
+class Trainer:
+
+    def __init__(self, table, size=(wwsim.ROWS, wwsim.COLUMNS), engine='bitmask', seed=0, maxSteps=1000, schedule=None,
+                 replay=None, firstEpisode=None):
+        if table.values.shape[0] != size[0] * size[1]:
+            raise ValueError('The Q-table has ' + str(table.values.shape[0]) + ' states, a ' + str(size[1]) + 'x' +
+                             str(size[0]) + ' world needs ' + str(size[0] * size[1]))
+        if schedule is None:
+            schedule = EpsilonSchedule(wwagent_v3.epsilon if table.epsilon is None else table.epsilon)
+        self.table = table
+        self.size = size
+        self.engine = engine
+        self.seed = seed
+        self.maxSteps = maxSteps
+        self.schedule = schedule
+        self.replay = replay
+        self.firstEpisode = table.episodes if firstEpisode is None else firstEpisode
+        self.epsilon = schedule.value(0)
+        # reused by every episode, run_episode makes its agent
+        self.sim = wwsim.Simulation(size[0], size[1], 0, None, seed, self.firstEpisode)
+
+    def makeAgent(self, cols, rows):
+        agent = wwagent_v3.WWAgent(self.engine, cols=cols, rows=rows, qtable=self.table, replay=self.replay)
+        agent.epsilon = self.epsilon
+        return agent
+
+    # runs one episode, returns its EpisodeResult, the outcome 'error' for an agent that raised
+    def runEpisode(self, episodeId):
+        self.epsilon = self.schedule.value(episodeId - self.firstEpisode)
+        try:
+            return wwsim.run_episode(self.makeAgent, self.seed, self.maxSteps, episodeId, self.size[0], self.size[1],
+                                     sim=self.sim)
+        except Exception:
+            return wwsim.errorResult(self.seed, episodeId)
+
+    # trains on the next 'episodes' episodes of the table and returns their learning curve
+    # progress, if given, is called with (episodes done, curve) every 'every' episodes
+    # errors, a list, gets the EpisodeResult of every episode that raised, with its traceback
+    def run(self, episodes, progress=None, every=1000, errors=None):
+        curve = newCurve(episodes)
+        level = wwlog.setLevel(wwlog.QUIET)
+        try:
+            for i in range(episodes):
+                episodeId = self.table.episodes
+                result = self.runEpisode(episodeId)
+                recordEpisode(curve, i, episodeId, result, self.epsilon)
+                if errors is not None and result.outcome == 'error':
+                    errors.append(result)
+                self.table.episodes += 1
+                if progress is not None and (i + 1) % every == 0:
+                    progress(i + 1, curve)
+        finally:
+            wwlog.setLevel(level)
+        self.table.epsilon = self.epsilon
+        return curve
+
+# Trainer of the worker process, set once by initWorker
+workerMemory = None
+workerTrainer = None
+
+# attaches the worker to the shared Q-table and gives it a Trainer of its own, with its own replay buffer
+def initWorker(memoryName, shape, engine, seed, maxSteps, size, schedule, firstEpisode, replay=None):
+    global workerMemory, workerTrainer
+    workerMemory = shared_memory.SharedMemory(memoryName)
+    table = QTable(shape[0], shape[1], values=np.ndarray(shape, dtype=np.float64, buffer=workerMemory.buf))
+    # the replay buffers are not seeded, the order the workers take the episodes in is not reproducible anyway
+    workerTrainer = Trainer(table, size, engine, seed, maxSteps, schedule, makeReplay(replay), firstEpisode)
+    wwlog.setLevel(wwlog.QUIET)
+
+# runs one training episode in a worker, returns (episodeId, EpisodeResult, epsilon)
+def trainEpisode(episodeId):
+    result = workerTrainer.runEpisode(episodeId)
+    return (episodeId, result, workerTrainer.epsilon)
+
+# trains 'table' (by default a new one for the grid size) on 'episodes' episodes of the batch 'seed'
+# the episode IDs go on from the episodes the table has already learned from, so a resumed training sees new worlds
+# schedule, an EpsilonSchedule, sets the exploration rate of each episode, see Trainer
+# replay, the (capacity, batchSize, rate, discount, prioritized) of a wwreplay.ReplayBuffer, gives each worker a buffer
+# errors, a list, gets the EpisodeResult of every episode that raised, with its traceback
+# returns the learning curve of the episodes, see newCurve, workers=1 trains in this process with a Trainer
+def train(episodes, workers=None, seed=0, maxSteps=1000, size=(wwsim.ROWS, wwsim.COLUMNS), engine='bitmask', table=None,
+          replay=None, schedule=None, progress=None, every=1000, errors=None):
+    if table is None:
+        table = QTable.for_grid(size[1], size[0])
+    trainer = Trainer(table, size, engine, seed, maxSteps, schedule, makeReplay(replay, seed))
+    if workers == 1:
+        return trainer.run(episodes, progress, every, errors)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    firstEpisode = table.episodes
+    shape = table.values.shape
+    curve = newCurve(episodes)
+    memory = shared_memory.SharedMemory(create=True, size=table.values.nbytes)
+    try:
+        shared = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+        shared[:] = table.values
+        chunksize = max(1, episodes // (workers * 16))
+        with multiprocessing.Pool(workers, initWorker, (memory.name, shape, engine, seed, maxSteps, size, trainer.schedule,
+                                                        firstEpisode, replay)) as pool:
+            done = 0
+            # in order, so the curve is filled from the start as the episodes come in
+            for episodeId, result, epsilon in pool.imap(trainEpisode, range(firstEpisode, firstEpisode + episodes), chunksize):
+                recordEpisode(curve, episodeId - firstEpisode, episodeId, result, epsilon)
+                if errors is not None and result.outcome == 'error':
+                    errors.append(result)
+                done += 1
+                if progress is not None and done % every == 0:
+                    progress(done, curve)
+        if table.readonly:
+            table.values = np.array(shared)
+        else:
+            table.values[:] = shared
+        del shared
+    finally:
+        memory.close()
+        memory.unlink()
+    table.episodes += episodes
+    table.epsilon = trainer.schedule.value(episodes - 1)
+    return curve
+
+# progress of train, win rate and mean score of the last 'every' episodes
+def printProgress(every):
+    def progress(done, curve):
+        recent = slice(max(0, done - every), done)
+        print('Episodes: ', done, '   Win Rate: ', round(float(curve['win'][recent].mean()), 4),
+              '   Mean score: ', round(float(curve['score'][recent].mean()), 2),
+              '   Epsilon: ', round(float(curve['epsilon'][done - 1]), 4))
+    return progress
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the Q-learning agent on many episodes across a process pool.')
+    parser.add_argument('-episodes', type=int, default=1000, help='number of training episodes (default 1000)')
+    parser.add_argument('-workers', type=int, default=None, help='number of worker processes, 1 trains in this process (default: all cores)')
+    parser.add_argument('-seed', type=int, default=0, help='seed of the training worlds (default 0)')
+    parser.add_argument('-maxsteps', type=int, default=1000, help='steps before an episode times out (default 1000)')
+    parser.add_argument('-engine', choices=wwagent.ENGINES, default='bitmask', help='inference engine of the agent (default bitmask)')
+    parser.add_argument('-size', default='4x4', help='size of the worlds, rooms across x rooms down (default 4x4)')
+    parser.add_argument('-epsilon', type=float, default=None,
+                        help='chance of a move from the Q-table (default: the table\'s, or ' + str(wwagent_v3.epsilon) + ')')
+    parser.add_argument('-decay', choices=SCHEDULES, default=None,
+                        help='schedule of epsilon from -epsilon to -epsilonend (default linear with -epsilonend, else constant)')
+    parser.add_argument('-epsilonend', type=float, default=None, help='epsilon at the end of the decay')
+    parser.add_argument('-decayepisodes', type=int, default=None, help='episodes epsilon decays over (default: all of them)')
+    parser.add_argument('-qtable', default=None, help='Q-table file to start from, if it exists, and to save the training to')
+    parser.add_argument('-replay', type=int, default=None, help='keep this many steps in each worker to learn from again')
+    parser.add_argument('-batch', type=int, default=32, help='steps learned from again after each step, with -replay (default 32)')
+    parser.add_argument('-rate', type=float, default=0.1, help='learning rate of the replayed steps (default 0.1)')
+    parser.add_argument('-discount', type=float, default=None,
+                        help='discount of the next state\'s value in replayed steps (default: the agent\'s rule of adding 1)')
+    parser.add_argument('-prioritized', action='store_true', help='replay the steps with the largest errors more often')
+    parser.add_argument('-curve', default=None, help='write the return, length, win and epsilon of every episode to this .npz file')
+    parser.add_argument('-report', type=int, default=0, help='print the progress every this many episodes (default: never)')
+    parser.add_argument('-json', default=None, help='also write the summary to this file')
+    args = parser.parse_args(argv)
+    if args.episodes < 1:
+        parser.error('-episodes must be at least 1')
+    if args.replay is not None and (args.replay < 1 or args.batch < 1):
+        parser.error('-replay and -batch must be at least 1')
+    replay = None
+    if args.replay:
+        replay = (args.replay, args.batch, args.rate, args.discount, args.prioritized)
+    try:
+        size = wwsim.parseSize(args.size, 'wwtrain.py')
+    except Exception as e:
+        parser.error(str(e))
+    if args.qtable and os.path.exists(args.qtable):
+        table = QTable.load(args.qtable, 'c')
+    else:
+        table = QTable.for_grid(size[1], size[0])
+    if args.epsilon is not None:
+        table.epsilon = args.epsilon
+    epsilon = wwagent_v3.epsilon if table.epsilon is None else table.epsilon
+    decay = args.decay or ('linear' if args.epsilonend is not None else 'constant')
+    try:
+        schedule = EpsilonSchedule(epsilon, args.epsilonend, args.decayepisodes or args.episodes, decay)
+    except ValueError as e:
+        parser.error(str(e))
+    progress = printProgress(args.report) if args.report > 0 else None
+    errors = []
+    start = time.perf_counter()
+    try:
+        curve = train(args.episodes, args.workers, args.seed, args.maxsteps, size, args.engine, table, replay, schedule,
+                      progress, args.report, errors)
+    except ValueError as e:
+        parser.error(str(e))
+    summary = summarizeCurve(curve, time.perf_counter() - start, errors=errors)
+    printCurveSummary(summary)
+    print('Q-table: ', table, '   Episodes learned from: ', table.episodes)
+    if args.qtable:
+        table.save(args.qtable)
+    if args.curve:
+        saveCurve(args.curve, curve)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == '__main__':
+    main()